@@ -0,0 +1,156 @@
+"""Benchmark the torch and ONNX (int8) backends of the DistilBERT ranker.
+
+Each backend runs in its own process so load time and RSS are measured in
+isolation. Embeddings from both backends are compared on the same corpus to
+check that the quantized model stays within tolerance.
+
+Usage:
+    python -m benchmarks.bert_backends [--corpus DIR] [--repeats N]
+
+Without --corpus a fixed, seeded synthetic transcript corpus is used so runs
+are comparable across machines and commits.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+BACKENDS = ["torch", "onnx"]
+SYNTHETIC_SIZES = [200, 1000, 2000]  # Sentences per transcript
+WORDS = (
+    "today we are going to talk about the market the model the data "
+    "people think this video explains why growth matters and how the "
+    "system works in practice so let me show you an example first"
+).split()
+
+
+def build_corpus(corpus_dir: str = None) -> Dict[str, str]:
+    """Load transcripts from corpus_dir or build the seeded synthetic corpus."""
+    if corpus_dir:
+        corpus = {}
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith(".txt"):
+                with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+                    corpus[name] = f.read()
+        return corpus
+
+    rng = random.Random(42)
+    corpus = {}
+    for size in SYNTHETIC_SIZES:
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24)))
+            for _ in range(size)
+        ]
+        corpus[f"synthetic_{size}"] = ". ".join(sentences)
+    return corpus
+
+
+def _rss_mb() -> float:
+    import psutil
+
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def _run_backend(backend: str, corpus: Dict[str, str], repeats: int, queue) -> None:
+    """Measure one backend in a fresh process and report through queue."""
+    from src.config import BERT_CONFIG
+    from src.services.bert_ranker import BertRanker
+
+    # Without the embedding cache, repeated runs measure the backend rather
+    # than cache hits, and nothing is written to the shared store
+    config = dict(BERT_CONFIG, backend=backend, embedding_cache_enabled=False)
+    rss_start = _rss_mb()
+    load_start = time.perf_counter()
+    ranker = BertRanker(config)
+    load_time = time.perf_counter() - load_start
+    rss_loaded = _rss_mb()
+
+    latencies = {}
+    for name, content in corpus.items():
+        ranker.select_key_sentences(content, 5)  # Warm-up run
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ranker.select_key_sentences(content, 5)
+            runs.append(time.perf_counter() - start)
+        latencies[name] = statistics.median(runs)
+
+    # Sentence embeddings of the first transcript, for the equivalence check
+    first = next(iter(corpus.values()))
+    sample = [s for s in first.split(". ") if s.strip()][:256]
+    embeddings = ranker.embed_sentences(sample)
+
+    queue.put(
+        {
+            "backend": backend,
+            "load_time": load_time,
+            "model_rss_mb": rss_loaded - rss_start,
+            # ru_maxrss is reported in kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "latencies": latencies,
+            "embeddings": embeddings,
+        }
+    )
+
+
+def compare_embeddings(a: np.ndarray, b: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two embedding matrices."""
+    a_unit = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b_unit = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cosine = (a_unit * b_unit).sum(axis=1)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="Directory of .txt transcripts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.99,
+        help="Minimum cosine similarity between backend embeddings",
+    )
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.corpus)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in BACKENDS:
+        queue = context.Queue()
+        process = context.Process(
+            target=_run_backend, args=(backend, corpus, args.repeats, queue)
+        )
+        process.start()
+        results[backend] = queue.get()
+        process.join()
+
+    print(f"{'backend':<8} {'load s':>8} {'model MB':>9} {'peak MB':>8}  latency per transcript (s)")
+    for backend, result in results.items():
+        latencies = "  ".join(
+            f"{name}={latency:.3f}" for name, latency in result["latencies"].items()
+        )
+        print(
+            f"{backend:<8} {result['load_time']:>8.2f} {result['model_rss_mb']:>9.0f} "
+            f"{result['peak_rss_mb']:>8.0f}  {latencies}"
+        )
+
+    similarity = compare_embeddings(
+        results["torch"]["embeddings"], results["onnx"]["embeddings"]
+    )
+    status = "OK" if similarity["min_cosine"] >= args.tolerance else "FAIL"
+    print(
+        f"\nEmbedding agreement: min cosine {similarity['min_cosine']:.4f}, "
+        f"mean {similarity['mean_cosine']:.4f} (tolerance {args.tolerance}) {status}"
+    )
+
+
+if __name__ == "__main__":
+    main()
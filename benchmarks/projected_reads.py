@@ -0,0 +1,81 @@
+"""Compare full user-document reads with field-mask projected reads.
+
+Builds a user document with a long stats history, then times reading it in
+full against reading only the fields the narrow getters need, and reports
+the size of what each read returns.
+
+Run it with a local backend, or against the Firestore emulator:
+
+    DATABASE_BACKEND=sqlite python -m benchmarks.projected_reads
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.projected_reads
+
+The bot's environment variables (TELEGRAM_BOT_TOKEN etc.) must be set since
+the database modules load src.config.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+import firebase_admin
+
+PROJECT_ID = "sumari-projected-reads"
+FIELD_MASKS = {
+    "get_user_language": ["preferences.menu_language"],
+    "get_user_preferences": ["preferences"],
+    "get_premium_status": ["premium"],
+    "get_usage_record": ["usage"],
+}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months", type=int, default=120, help="stats.monthly entries")
+    parser.add_argument("--reads", type=int, default=500, help="Reads per variant")
+    args = parser.parse_args(argv)
+
+    if os.getenv("DATABASE_BACKEND", "firestore") == "firestore":
+        if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+            sys.exit("Set DATABASE_BACKEND or FIRESTORE_EMULATOR_HOST; refusing to use Firestore")
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(options={"projectId": PROJECT_ID})
+
+    from src.database import db_manager
+
+    user_id = int(time.time() * 1000)
+    db_manager.add_user(user_id)
+    monthly = {
+        f"{2000 + month // 12}-{month % 12 + 1:02d}": {
+            "summaries_used": month,
+            "audio_summaries": month // 2,
+            "total_processing_time": month * 1.5,
+        }
+        for month in range(args.months)
+    }
+    user_ref = db_manager._get_user_doc(user_id)
+    user_ref.set({"stats": {"monthly": monthly}}, merge=True)
+
+    def measure(field_paths=None):
+        start = time.perf_counter()
+        for _ in range(args.reads):
+            data = user_ref.get(field_paths=field_paths).to_dict()
+        elapsed = (time.perf_counter() - start) / args.reads
+        return elapsed * 1e6, len(json.dumps(data, default=str))
+
+    full_us, full_bytes = measure()
+    print(f"{'full document':<22} {full_us:9.1f} µs/read {full_bytes:8d} bytes")
+    for getter, field_paths in FIELD_MASKS.items():
+        read_us, read_bytes = measure(field_paths)
+        print(
+            f"{getter:<22} {read_us:9.1f} µs/read {read_bytes:8d} bytes "
+            f"({full_us / read_us:.1f}x faster, {full_bytes / max(read_bytes, 1):.0f}x smaller)"
+        )
+
+    user_ref.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Load-test the summary job queue's tier scheduling.
+
+Simulated summary jobs (sleeps with exponentially distributed service
+times) arrive as open-loop Poisson streams: a steady pro-tier stream at a
+small share of capacity, plus a free-tier stream swept from half to four
+times the workers' capacity. For each free-tier load, the end-to-end
+latency (submit to finish) of each tier is reported, once with the
+weighted fair scheduler (tiers and caps from TIER_LIMITS) and once with
+every job in a single FIFO queue for comparison. With the fair scheduler,
+pro p95 should stay flat while the free tier saturates and gets rejected.
+
+After the arrivals stop the queue is drained, for at most --drain-timeout
+seconds. Jobs still queued or running then are censored: they count in the
+latencies with their time so far, a lower bound, and are reported apart.
+
+    python -m benchmarks.queue_load
+    python -m benchmarks.queue_load --service-ms 100 --duration 20
+
+The bot's environment variables (TELEGRAM_BOT_TOKEN etc.) must be set since
+the queue loads src.config.
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Dict, List
+
+from src.config import SUMMARY_QUEUE_CONFIG, TIER_LIMITS
+from src.logging.histogram import LatencyHistogram
+from src.services.summary_queue import SummaryJobQueue
+
+
+async def run_scenario(
+    args: argparse.Namespace, free_rate: float, pro_rate: float, fair: bool
+) -> Dict[str, Dict]:
+    """Run one load level and return latency summaries per tier."""
+    config = {
+        **SUMMARY_QUEUE_CONFIG,
+        "workers": args.workers,
+        "max_depth": args.max_depth,
+    }
+    if fair:
+        queue = SummaryJobQueue(config, TIER_LIMITS, name="load.fair")
+    else:
+        fifo_limits = {"free": {"queue_weight": 1, "max_concurrent_jobs": args.workers}}
+        queue = SummaryJobQueue(config, fifo_limits, name="load.fifo")
+
+    latencies = {"free": LatencyHistogram(), "pro": LatencyHistogram()}
+    rejected = {"free": 0, "pro": 0}
+    censored = {"free": 0, "pro": 0}
+    loop = asyncio.get_running_loop()
+    rng = random.Random(args.seed)
+    queue.start()
+
+    def make_job(tier: str, submitted_at: float):
+        service = rng.expovariate(1000 / args.service_ms)
+
+        async def censor() -> None:
+            censored[tier] += 1
+            latencies[tier].record(loop.time() - submitted_at)
+
+        async def job() -> None:
+            try:
+                await asyncio.sleep(service)
+            except asyncio.CancelledError:
+                await censor()
+                raise
+            latencies[tier].record(loop.time() - submitted_at)
+
+        return job, censor
+
+    async def arrivals(tier: str, rate: float) -> None:
+        end = loop.time() + args.duration
+        while loop.time() < end:
+            await asyncio.sleep(rng.expovariate(rate))
+            job, censor = make_job(tier, loop.time())
+            if not queue.submit(job, tier=tier, on_cancel=censor):
+                rejected[tier] += 1
+
+    await asyncio.gather(arrivals("free", free_rate), arrivals("pro", pro_rate))
+    await queue.stop(timeout=args.drain_timeout)
+
+    return {
+        tier: {
+            **latencies[tier].summary(),
+            "rejected": rejected[tier],
+            "censored": censored[tier],
+        }
+        for tier in latencies
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    capacity = args.workers * 1000 / args.service_ms
+    pro_rate = capacity * args.pro_share
+    print(
+        f"{args.workers} workers, mean service {args.service_ms:.0f} ms "
+        f"(capacity {capacity:.0f} jobs/s), pro load {pro_rate:.0f} jobs/s"
+    )
+    print(
+        f"{'scheduler':<10}{'free load':>10}{'pro p50':>10}{'pro p95':>10}"
+        f"{'free p50':>10}{'free p95':>10}{'free rej':>10}{'censored':>10}"
+    )
+    for load in args.free_loads:
+        for fair in (True, False):
+            stats = await run_scenario(args, capacity * load, pro_rate, fair)
+            print(
+                f"{'fair' if fair else 'fifo':<10}{load:>9.1f}x"
+                f"{stats['pro']['p50_ms']:>8.0f}ms{stats['pro']['p95_ms']:>8.0f}ms"
+                f"{stats['free']['p50_ms']:>8.0f}ms{stats['free']['p95_ms']:>8.0f}ms"
+                f"{stats['free']['rejected']:>10d}"
+                f"{stats['free']['censored'] + stats['pro']['censored']:>10d}"
+            )
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=SUMMARY_QUEUE_CONFIG["workers"])
+    parser.add_argument(
+        "--max-depth", type=int, default=SUMMARY_QUEUE_CONFIG["max_depth"]
+    )
+    parser.add_argument("--service-ms", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument(
+        "--pro-share", type=float, default=0.1, help="Pro load as a share of capacity"
+    )
+    parser.add_argument(
+        "--free-loads",
+        type=float,
+        nargs="+",
+        default=[0.5, 1.0, 2.0, 4.0],
+        help="Free load levels as multiples of capacity",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds to let queued jobs finish after the arrivals stop",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Check that rate limits and claims hold globally across worker processes.
+
+Starts several processes, each with its own shared state client built from
+SHARED_STATE_CONFIG, as separate uvicorn workers would. They all hammer
+one fixed-window counter (limited like the webhook rate limit) and race to
+claim one key (like an in-flight transcript fetch). With a distributed
+backend the totals must match a single worker's: the limit in all, and
+exactly one claim. With the memory backend each process applies the limit
+on its own, which shows what the shared state fixes. Per-operation
+latency is reported too.
+
+Run it against a local Redis, or any server speaking the Redis protocol:
+
+    SHARED_STATE_BACKEND=memory python -m benchmarks.shared_state_check
+    SHARED_STATE_BACKEND=redis REDIS_URL=redis://localhost:6379/0 \\
+        python -m benchmarks.shared_state_check --workers 8
+
+Latencies are only meaningful against a real server: pure-Python stand-ins
+(e.g. fakeredis's TcpFakeServer) answer pipelined commands, and so incr(),
+tens of milliseconds late, while Redis answers them in one round trip.
+
+The bot's environment variables (TELEGRAM_BOT_TOKEN etc.) must be set since
+the shared state loads src.config.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+import uuid
+from typing import Dict, List
+
+from src.config import SHARED_STATE_CONFIG
+from src.core.utils.shared_state import create_shared_state
+from src.logging.histogram import LatencyHistogram
+
+
+async def make_requests(args: argparse.Namespace, run_id: str, start_at: float) -> Dict:
+    """Make the requests of one worker and report what it was allowed."""
+    state = create_shared_state(SHARED_STATE_CONFIG)
+    latency = LatencyHistogram()
+    counter_key = f"check:{run_id}:counter"
+    claim_key = f"check:{run_id}:claim"
+
+    # Start together so the processes really race
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    claimed = await state.add(claim_key, True, args.window)
+    latency.record(time.perf_counter() - started)
+
+    allowed = 0
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        count = await state.incr(counter_key, args.window)
+        latency.record(time.perf_counter() - started)
+        if count <= args.limit:
+            allowed += 1
+    return {"allowed": allowed, "claimed": claimed, "latency": latency.summary()}
+
+
+def run_worker(args: argparse.Namespace, run_id: str, start_at: float) -> Dict:
+    """Run one worker's requests on its own event loop."""
+    return asyncio.run(make_requests(args, run_id, start_at))
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="Processes")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per worker")
+    parser.add_argument("--limit", type=int, default=100, help="Requests per window")
+    parser.add_argument("--window", type=float, default=60.0, help="Window in seconds")
+    args = parser.parse_args(argv)
+
+    run_id = uuid.uuid4().hex[:8]
+    start_at = time.time() + 1.0
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.starmap(
+            run_worker, [(args, run_id, start_at)] * args.workers
+        )
+
+    allowed = sum(result["allowed"] for result in results)
+    claims = sum(result["claimed"] for result in results)
+    expected = min(args.limit, args.requests * args.workers)
+    distributed = SHARED_STATE_CONFIG["backend"] == "redis"
+    print(
+        f"{SHARED_STATE_CONFIG['backend']} backend, {args.workers} workers x "
+        f"{args.requests} requests, limit {args.limit} per window"
+    )
+    print(f"allowed {allowed} (global limit: {expected})")
+    print(f"claims  {claims} (expected: 1)")
+    for index, result in enumerate(results):
+        stats = result["latency"]
+        print(
+            f"worker {index}: p50 {stats['p50_ms']:.3f} ms, "
+            f"p95 {stats['p95_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms"
+        )
+
+    if distributed and (allowed != expected or claims != 1):
+        raise SystemExit("Shared state did not hold the limits across workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Check that concurrent increment_user_stats calls never lose increments.
+
+Many writers (threads using the sync DatabaseManager and tasks using the
+async one) record summaries for the same user at the same time; afterwards
+the user's total and monthly counters must equal the number of calls.
+
+Run it against the Firestore emulator, never a real project:
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.stats_concurrency
+
+The bot's environment variables (TELEGRAM_BOT_TOKEN etc.) must be set since
+the database modules load src.config.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List
+
+import firebase_admin
+
+PROJECT_ID = "sumari-stats-concurrency"
+PROCESSING_TIME = 0.5
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=25, help="Calls per writer")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        sys.exit("FIRESTORE_EMULATOR_HOST is not set; refusing to write to Firestore")
+
+    # Initialize against the emulator before db_manager looks for credentials
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(options={"projectId": PROJECT_ID})
+
+    from src.database import async_db_manager, db_manager
+
+    user_id = int(time.time() * 1000)
+    db_manager.add_user(user_id)
+
+    def sync_writer(_) -> None:
+        for _ in range(args.calls):
+            db_manager.increment_user_stats(user_id, "audio", PROCESSING_TIME)
+
+    async def async_writers() -> None:
+        async def writer() -> None:
+            for _ in range(args.calls):
+                await async_db_manager.increment_user_stats(
+                    user_id, "audio", PROCESSING_TIME
+                )
+
+        await asyncio.gather(*(writer() for _ in range(args.tasks)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        sync_done = pool.map(sync_writer, range(args.threads))
+        asyncio.run(async_writers())
+        list(sync_done)
+    elapsed = time.perf_counter() - start
+
+    expected = (args.threads + args.tasks) * args.calls
+    stats = db_manager.db.collection("users").document(str(user_id)).get().to_dict()[
+        "stats"
+    ]
+    month = stats["monthly"][datetime.now().strftime("%Y-%m")]
+
+    failures = []
+    for scope, counters in (("total", stats["total"]), ("monthly", month)):
+        for counter in ("summaries_used", "audio_summaries"):
+            if counters[counter] != expected:
+                failures.append(f"{scope}.{counter}={counters[counter]}")
+        if abs(counters["total_processing_time"] - expected * PROCESSING_TIME) > 1e-6:
+            failures.append(
+                f"{scope}.total_processing_time={counters['total_processing_time']}"
+            )
+
+    print(f"{expected} concurrent increments in {elapsed:.2f}s")
+    if failures:
+        sys.exit(f"FAIL: expected {expected}, got {', '.join(failures)}")
+    print("OK: no lost increments")
+
+
+if __name__ == "__main__":
+    main()
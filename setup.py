@@ -5,7 +5,6 @@ setup(
     version="0.1",
     packages=find_packages(),
     install_requires=[
-        "flask",
         "python-telegram-bot",
         "google-generativeai",
         "firebase-admin",
@@ -14,4 +13,11 @@ setup(
         "stripe>=8.0.0",
         "stripe",
     ],
+    extras_require={
+        # DistilBERT ranker (BERT summaries), default BERT_BACKEND=torch
+        "bert": ["torch", "transformers"],
+        # BERT_BACKEND=onnx: onnxruntime runs the model; torch, transformers
+        # and onnx export and quantize it on first use
+        "onnx": ["onnxruntime>=1.16", "onnx>=1.14", "torch", "transformers"],
+    },
 )
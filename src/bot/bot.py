@@ -1,9 +1,9 @@
 """Main bot module that initializes and runs the Telegram bot."""
 
-import asyncio
 import logging
-from flask import Flask, request
-from telegram import Update, Bot
+import time
+from typing import Dict
+from telegram import Update, Bot, Message
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -20,8 +20,9 @@ from src.config import (
     logger,
     TON_CONFIG,
 )
-from src.services import VideoProcessor
+from src.services import VideoProcessor, summary_queue
 from src.services import payment_processor
+from src.database import async_db_manager
 from src.core.utils import (
     extract_video_id,
     get_user_language,
@@ -29,11 +30,17 @@ from src.core.utils import (
     format_eta,
     handle_error,
     are_notifications_enabled,
+    get_user_snapshot,
+    UserSnapshot,
 )
+from src.core.utils.rate_limit import check_rate_limit
 from src.core.utils.text import escape_md
 from src.core.utils.security import security_check
 from src.core.localization import get_message
-from src.core.keyboards import create_main_menu_keyboard
+from src.core.keyboards import (
+    create_main_menu_keyboard,
+    create_premium_upgrade_keyboard,
+)
 from src.bot.handlers.basic import start
 from src.bot.handlers.limits import check_summary_limits_and_notify
 from src.bot.handlers import (
@@ -52,9 +59,6 @@ from src.bot.handlers import (
 )
 from src.core.utils.error_handler import handle_error
 
-# Flask app for webhook
-app = Flask(__name__)
-
 # Create a single application instance
 # Create bot instance
 bot = Bot(TOKEN)
@@ -70,13 +74,114 @@ payment_processor.bot = application.bot
 application.add_error_handler(handle_error)
 
 
+async def run_summary_job(
+    bot: Bot,
+    message: Message,
+    processing_msg: Message,
+    user_id: int,
+    video_id: str,
+    language: str,
+    notifications_enabled: bool,
+    snapshot: UserSnapshot,
+    reservation: Dict,
+) -> None:
+    """Summarize a video for handle_text and send the result.
+
+    Runs on a summary_queue worker, after the handler has returned. Progress
+    is shown by editing processing_msg, which is deleted when done. The
+    summary was reserved against the user's limit by handle_text (see
+    reserve_summary); the reservation is given back if none is delivered.
+    """
+    video_processor = VideoProcessor()
+    delivered = False
+
+    try:
+        await processing_msg.edit_text(
+            text=get_message("fetching", language),
+            parse_mode=ParseMode.MARKDOWN_V2,
+        )
+
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+
+        async def show_eta(content: str) -> None:
+            # Only reached on a summary cache miss, once the transcript is in
+            eta_text = format_eta(calculate_eta(len(content)))
+            await processing_msg.edit_text(
+                text=get_message("processing_video", language).format(eta=eta_text),
+                parse_mode=ParseMode.MARKDOWN_V2,
+            )
+            await processing_msg.edit_text(
+                text=get_message("summarizing", language),
+                parse_mode=ParseMode.MARKDOWN_V2,
+            )
+
+        # Process YouTube video with Gemini only; cached summaries skip the
+        # transcript fetch altogether
+        start_time = time.time()
+        success, result = await video_processor.process_link(
+            link=video_url,
+            user_id=user_id,
+            language=language,
+            summary_type="gemini",
+            snapshot=snapshot,
+            on_content=show_eta,
+        )
+
+        # Handle result (cached summaries are accounted like fresh ones)
+        if success:
+            await video_processor.send_summary(
+                bot=bot,
+                chat_id=message.chat_id,
+                summary_data=result,
+                language=language,
+                disable_notification=not notifications_enabled,
+                user_id=user_id,
+                summary_type="gemini",
+                processing_time=time.time() - start_time,
+                content_length=result.get("content_length"),
+                url=video_url,
+            )
+            delivered = True
+        else:
+            logger.error(f"Failed to process video {video_id}: {result}")
+            await message.reply_text(
+                text=escape_md(
+                    get_message("error_processing", language).format(
+                        error=result["error"]
+                    )
+                ),
+                parse_mode=ParseMode.MARKDOWN_V2,
+                disable_notification=not notifications_enabled,
+            )
+    except Exception as e:
+        logger.error(f"Error processing video {video_id}: {str(e)}")
+        await message.reply_text(
+            text=escape_md(
+                get_message("error_processing", language).format(error=str(e))
+            ),
+            parse_mode=ParseMode.MARKDOWN_V2,
+            disable_notification=not notifications_enabled,
+        )
+    finally:
+        if not delivered:
+            await async_db_manager.release_summary(user_id, reservation)
+        # Always try to delete the processing message
+        try:
+            await processing_msg.delete()
+        except Exception as e:
+            logger.error(f"Error deleting processing message: {str(e)}")
+
+
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle text messages and URLs."""
     try:
         text = update.message.text
         user_id = update.effective_user.id
-        language = get_user_language(user_id)
-        notifications_enabled = are_notifications_enabled(user_id)
+
+        # Read the user's document once and serve every lookup from it
+        snapshot = await get_user_snapshot(context, user_id)
+        language = get_user_language(user_id, snapshot)
+        notifications_enabled = are_notifications_enabled(user_id, snapshot)
 
         # Perform security checks first
         is_allowed, error_message = await security_check(update)
@@ -115,88 +220,74 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             return
 
         # First check if user has hit their limits
-        can_proceed = await check_summary_limits_and_notify(update)
+        can_proceed = await check_summary_limits_and_notify(update, snapshot)
         if not can_proceed:
             return
 
-        # Show initial processing message
-        processing_msg = await update.message.reply_text(
-            text=get_message("fetching", language),
-            parse_mode=ParseMode.MARKDOWN_V2,
-            disable_notification=not notifications_enabled,
-        )
-
-        # Initialize video processor
-        video_processor = VideoProcessor()
-
-        try:
-            # Try to extract content first
-            content = await video_processor._extract_content(
-                f"https://www.youtube.com/watch?v={video_id}"
+        # Check the rate limit now, not in the queued job, so the user is
+        # never told "queued" for a request that is then turned down
+        if not await check_rate_limit(user_id):
+            await update.message.reply_text(
+                text=get_message("rate_limit", language),
+                parse_mode=ParseMode.MARKDOWN_V2,
+                disable_notification=not notifications_enabled,
             )
-            if not content:
-                raise ValueError("No transcript available")
-
-            # Calculate ETA based on content length
-            content_length = len(content)
-            eta_seconds = calculate_eta(content_length)
-            eta_text = format_eta(eta_seconds)
+            return
 
-            # Update message with ETA
-            await processing_msg.edit_text(
-                text=get_message("processing_video", language).format(eta=eta_text),
+        # Count the summary against the limit before queueing it, so several
+        # queued or concurrent jobs of a user can't pass the limit together.
+        # Storage errors raise and get the generic error reply below
+        reserved, reservation = await async_db_manager.reserve_summary(user_id)
+        if not reserved:
+            await update.message.reply_text(
+                text=get_message("summary_limit_reached", language).format(
+                    limit=reservation["limit"]
+                ),
                 parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=create_premium_upgrade_keyboard(language),
             )
+            return
 
-            # Show summarizing message
-            await processing_msg.edit_text(
-                text=get_message("summarizing", language),
+        # Acknowledge right away; a queue worker runs the summarization
+        try:
+            processing_msg = await update.message.reply_text(
+                text=get_message("queued", language),
                 parse_mode=ParseMode.MARKDOWN_V2,
+                disable_notification=not notifications_enabled,
             )
-
-            # Process YouTube video with Gemini only
-            success, result = await video_processor.process_link(
-                link=f"https://www.youtube.com/watch?v={video_id}",
+        except Exception:
+            await async_db_manager.release_summary(user_id, reservation)
+            raise
+
+        async def job() -> None:
+            await run_summary_job(
+                bot=context.bot,
+                message=update.message,
+                processing_msg=processing_msg,
                 user_id=user_id,
+                video_id=video_id,
                 language=language,
-                summary_type="gemini",
+                notifications_enabled=notifications_enabled,
+                snapshot=snapshot,
+                reservation=reservation,
             )
 
-            # Handle result
-            if success:
-                await video_processor.send_summary(
-                    bot=context.bot,
-                    chat_id=update.effective_chat.id,
-                    summary_data=result,
-                    language=language,
-                    disable_notification=not notifications_enabled,
-                )
-            else:
-                logger.error(f"Failed to process video {video_id}: {result}")
-                await update.message.reply_text(
-                    text=escape_md(
-                        get_message("error_processing", language).format(
-                            error=result["error"]
-                        )
-                    ),
-                    parse_mode=ParseMode.MARKDOWN_V2,
-                    disable_notification=not notifications_enabled,
-                )
-        except Exception as e:
-            logger.error(f"Error processing video {video_id}: {str(e)}")
-            await update.message.reply_text(
-                text=escape_md(
-                    get_message("error_processing", language).format(error=str(e))
-                ),
+        async def cancel() -> None:
+            # The queue shut down before running the job: give the summary
+            # back and tell the user instead of leaving "queued" up
+            await async_db_manager.release_summary(user_id, reservation)
+            await processing_msg.edit_text(
+                text=get_message("queue_cancelled", language),
+                parse_mode=ParseMode.MARKDOWN_V2,
+            )
+
+        tier = snapshot.premium.get("tier", "free")
+        if not summary_queue.submit(job, tier=tier, on_cancel=cancel):
+            await async_db_manager.release_summary(user_id, reservation)
+            await processing_msg.edit_text(
+                text=get_message("queue_full", language),
                 parse_mode=ParseMode.MARKDOWN_V2,
-                disable_notification=not notifications_enabled,
             )
-        finally:
-            # Always try to delete the processing message
-            try:
-                await processing_msg.delete()
-            except Exception as e:
-                logger.error(f"Error deleting processing message: {str(e)}")
 
     except Exception as e:
         logger.error(f"Error in handle_text: {str(e)}", exc_info=True)
@@ -208,21 +299,6 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         )
 
 
-# === OPTION 1: Webhook Approach ===
-@app.route(f"/{TOKEN}", methods=["POST"])
-def webhook():
-    """Handle incoming webhook updates."""
-    update = Update.de_json(request.get_json(force=True), application.bot)
-    asyncio.run(application.process_update(update))
-    return "ok"
-
-
-@app.route("/", methods=["GET"])
-def index():
-    """Health check endpoint."""
-    return "Bot is online."
-
-
 def add_handlers(application):
     """Add all handlers to the application."""
     # Basic command handlers
@@ -248,13 +324,14 @@ def add_handlers(application):
 add_handlers(application)
 
 
-# === OPTION 2: Polling Approach ===
 def run_polling():
-    """Run the bot using polling (for development)."""
+    """Run the bot using polling (for development).
+
+    In production, src.startup serves updates through the FastAPI webhook
+    in src/routes.py when WEBHOOK_URL is set.
+    """
     application.run_polling()
 
 
 if __name__ == "__main__":
-    # Choose ONE of these:
-    # app.run()  # For production with a public server
-    run_polling()  # For testing/development
+    run_polling()
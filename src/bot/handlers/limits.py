@@ -1,22 +1,29 @@
+from typing import Optional
 from telegram import Update
 from telegram.constants import ParseMode
 from src.core.keyboards import create_premium_upgrade_keyboard
 from src.core.localization import get_message
 from src.core.utils import get_user_language
-from src.core.utils import check_summary_limits
+from src.core.utils import check_summary_limits, UserSnapshot
 
 
-async def check_summary_limits_and_notify(update: Update) -> bool:
+async def check_summary_limits_and_notify(
+    update: Update, snapshot: Optional[UserSnapshot] = None
+) -> bool:
     """Check if user has hit summary limits and send appropriate notifications.
 
+    Args:
+        update: Telegram update
+        snapshot: Optional user snapshot already loaded for this update
+
     Returns:
         bool: True if user can proceed with summary, False if limit reached
     """
     user_id = update.effective_user.id
-    language = get_user_language(user_id)
+    language = get_user_language(user_id, snapshot)
 
     # Get limit info
-    limit_info = check_summary_limits(user_id)
+    limit_info = check_summary_limits(user_id, snapshot)
 
     if limit_info["has_reached_limit"]:
         # User has reached their limit
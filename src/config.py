@@ -106,20 +106,156 @@ MAX_SUMMARY_LENGTH = {
     "long": 5000,  # ~5k characters
 }
 
+# Bump whenever the summary prompts change so cached summaries are regenerated
+PROMPT_VERSION = "2"
+
+# State that must be global when the bot runs as several workers or
+# instances: rate limits, in-flight transcript fetches and cached summaries.
+# "memory" keeps it per process; "redis" shares it through any server
+# speaking the Redis protocol (needs the redis package)
+SHARED_STATE_CONFIG = {
+    "backend": os.getenv("SHARED_STATE_BACKEND", "memory").lower(),
+    "redis_url": os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    "key_prefix": os.getenv("SHARED_STATE_KEY_PREFIX", "sumari:"),
+    # Kept short: the bot calls the server from the event loop
+    "socket_timeout_seconds": float(os.getenv("SHARED_STATE_TIMEOUT_SECONDS", "0.5")),
+}
+
+# Summary Cache Configuration
+SUMMARY_CACHE_CONFIG = {
+    "enabled": os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true",
+    "max_entries": int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1000")),
+    "ttl_seconds": int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "86400")),  # 1 day
+    # Persistent backend behind the in-process LRU: "none", "sqlite",
+    # "firestore" or "shared" (the shared state store, default with redis)
+    "backend": os.getenv(
+        "SUMMARY_CACHE_BACKEND",
+        "shared" if SHARED_STATE_CONFIG["backend"] == "redis" else "none",
+    ).lower(),
+    "sqlite_path": os.getenv("SUMMARY_CACHE_SQLITE_PATH", "data/summary_cache.db"),
+    "firestore_collection": os.getenv("SUMMARY_CACHE_COLLECTION", "summary_cache"),
+}
+
+# Transcript Cache Configuration
+TRANSCRIPT_CACHE_CONFIG = {
+    "max_entries": int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "500")),
+    "ttl_seconds": int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", "3600")),  # 1 hour
+    # With shared state, how long one worker may hold a fetch of a video
+    # before others stop waiting for it, and how often they check on it
+    "inflight_ttl_seconds": float(os.getenv("TRANSCRIPT_INFLIGHT_TTL_SECONDS", "60")),
+    "inflight_poll_seconds": float(os.getenv("TRANSCRIPT_INFLIGHT_POLL_SECONDS", "0.25")),
+}
+
+# Async execution limits for summary processing
+PROCESSING_CONFIG = {
+    # Threads for blocking libraries (YouTube transcripts, HTML parsing, BERT)
+    "worker_threads": int(os.getenv("PROCESSING_WORKER_THREADS", "8")),
+    "gemini_max_concurrency": int(os.getenv("GEMINI_MAX_CONCURRENCY", "10")),
+    "http_max_concurrency": int(os.getenv("HTTP_MAX_CONCURRENCY", "20")),
+    "http_timeout_seconds": int(os.getenv("HTTP_TIMEOUT_SECONDS", "15")),
+}
+
+# Map-reduce summarization of long transcripts (sizes in approximate tokens)
+CHUNKING_CONFIG = {
+    # Content above this size is split into chunks instead of one Gemini call
+    "max_single_call_tokens": int(os.getenv("CHUNKING_MAX_SINGLE_CALL_TOKENS", "30000")),
+    "chunk_tokens": int(os.getenv("CHUNKING_CHUNK_TOKENS", "8000")),
+    "overlap_tokens": int(os.getenv("CHUNKING_OVERLAP_TOKENS", "200")),
+    "chars_per_token": 4,  # Rough estimate for Gemini tokenization
+    "max_concurrency": int(os.getenv("CHUNKING_MAX_CONCURRENCY", "4")),
+}
+
+# DistilBERT extractive ranking
+BERT_CONFIG = {
+    "model_name": "distilbert-base-multilingual-cased",
+    # Load the model at startup instead of on the first BERT summary
+    "warm_up": os.getenv("BERT_WARM_UP", "false").lower() == "true",
+    # Inference backend: "torch" or "onnx" (int8 dynamically quantized export)
+    "backend": os.getenv("BERT_BACKEND", "torch").lower(),
+    "onnx_path": os.getenv("BERT_ONNX_PATH", "data/models/distilbert-int8.onnx"),
+    "onnx_threads": int(os.getenv("BERT_ONNX_THREADS", "0")),  # 0 = all cores
+    # Persistent float16 cache of sentence embeddings shared between workers
+    "embedding_cache_enabled": os.getenv("BERT_EMBEDDING_CACHE", "true").lower()
+    == "true",
+    "embedding_cache_path": os.getenv(
+        "BERT_EMBEDDING_CACHE_PATH", "data/embeddings/sentences"
+    ),
+    "embedding_cache_capacity": int(
+        os.getenv("BERT_EMBEDDING_CACHE_CAPACITY", "200000")
+    ),
+    "batch_size": int(os.getenv("BERT_BATCH_SIZE", "32")),
+    "max_sentence_tokens": int(os.getenv("BERT_MAX_SENTENCE_TOKENS", "128")),
+    # Sliding windows used to embed the whole document (model limit is 512)
+    "window_tokens": int(os.getenv("BERT_WINDOW_TOKENS", "510")),
+    "window_overlap_tokens": int(os.getenv("BERT_WINDOW_OVERLAP_TOKENS", "64")),
+    # Number of topic centroids the windows are clustered into (1 = plain mean)
+    "document_centroids": int(os.getenv("BERT_DOCUMENT_CENTROIDS", "1")),
+}
+
+# Document storage behind DatabaseManager: "firestore", or a local
+# Firestore-compatible store ("memory" or "sqlite") for offline runs and
+# benchmarks
+DATABASE_CONFIG = {
+    "backend": os.getenv("DATABASE_BACKEND", "firestore").lower(),
+    "credentials_path": os.getenv(
+        "FIREBASE_CREDENTIALS_PATH",
+        "sumari-e218a-firebase-adminsdk-fbsvc-4237ee8346.json",
+    ),
+    "sqlite_path": os.getenv("DATABASE_SQLITE_PATH", "data/local_firestore.db"),
+}
+
+# In-process cache of users/{id} documents held by DatabaseManager
+USER_CACHE_CONFIG = {
+    "max_entries": int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    "ttl_seconds": int(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+}
+
+# Write-behind buffer for per-user counter increments
+WRITE_BUFFER_CONFIG = {
+    "enabled": os.getenv("WRITE_BUFFER_ENABLED", "true").lower() == "true",
+    "flush_interval_seconds": float(os.getenv("WRITE_BUFFER_FLUSH_SECONDS", "5")),
+    # Flush early once this many users have pending increments
+    "max_pending_users": int(os.getenv("WRITE_BUFFER_MAX_PENDING_USERS", "200")),
+}
+
+# Background summarization jobs, run by a bounded pool of workers
+SUMMARY_QUEUE_CONFIG = {
+    "workers": int(os.getenv("SUMMARY_QUEUE_WORKERS", "8")),
+    # Jobs of one tier waiting for a worker; requests beyond this are turned
+    # away (weights and per-tier concurrency caps are in TIER_LIMITS)
+    "max_depth": int(os.getenv("SUMMARY_QUEUE_MAX_DEPTH", "100")),
+    # How long shutdown waits for queued and running jobs to finish
+    "drain_timeout_seconds": float(os.getenv("SUMMARY_QUEUE_DRAIN_SECONDS", "60")),
+}
+
+# Telegram webhook ingress (src/routes.py); the bot polls when url is unset
+WEBHOOK_CONFIG = {
+    "url": os.getenv("WEBHOOK_URL"),
+    # Telegram echoes it in X-Telegram-Bot-Api-Secret-Token on every delivery
+    "secret_token": os.getenv("TELEGRAM_WEBHOOK_SECRET"),
+    "port": int(os.getenv("PORT", "8000")),
+}
+
 # Tier and Usage Limits
 TIER_LIMITS = {
     "free": {
         "monthly_summaries": 5,  # 5 summaries per month
         "max_users": 2000,  # Cap at 2000 free users
         "fallback_max_users": 1200,  # Fallback cap if conversion rate is low
+        "queue_weight": 1,  # Share of summary workers under load
+        "max_concurrent_jobs": 6,  # Summary workers the tier may use at once
     },
     "based": {
         "monthly_summaries": 100,  # 100 summaries per month
         "max_users": 500,  # No strict cap, but monitor
+        "queue_weight": 3,
+        "max_concurrent_jobs": 7,
     },
     "pro": {
         "monthly_summaries": 200,  # 200 summaries per month
         "max_users": 100,  # Cap at 100 pro users
+        "queue_weight": 6,  # Priority processing
+        "max_concurrent_jobs": 8,
     },
 }
 
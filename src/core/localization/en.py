@@ -19,6 +19,9 @@ EN = {
     "error_processing": "❌ Error processing video: {error}",
     "processing_video": "🎬 *Processing your video*\n⏱ Estimated time: {eta}",
     # Process messages
+    "queued": "🕒 Your video is in line and will be summarized shortly\\.\\.\\.",
+    "queue_full": "⚠️ I'm summarizing a lot of videos right now\\. Please send the link again in a few minutes\\.",
+    "queue_cancelled": "⚠️ I had to restart before I got to your video\\. Please send the link again\\.",
     "fetching": "🔍 Fetching transcript\\.\\.\\.",
     "summarizing": "⏳ Summarizing, please wait\\.\\.\\.",
     "transcript_short": "❌ Transcript too short to summarize\\.",
@@ -19,6 +19,9 @@ RU = {
     "error_processing": "❌ Ошибка обработки видео: {error}",
     "processing_video": "🎬 *Обработка видео*\n⏱ Примерное время: {eta}",
     # Process messages
+    "queued": "🕒 Видео в очереди, скоро начну обработку\\.\\.\\.",
+    "queue_full": "⚠️ Сейчас я обрабатываю много видео\\. Пожалуйста, отправь ссылку ещё раз через несколько минут\\.",
+    "queue_cancelled": "⚠️ Мне пришлось перезапуститься до того, как я взялся за твоё видео\\. Пожалуйста, отправь ссылку ещё раз\\.",
     "fetching": "🔍 Получаю субтитры\\.\\.\\.",
     "summarizing": "⏳ Создаю краткое содержание, пожалуйста, подожди\\.\\.\\.",
     "transcript_short": "❌ Текст слишком короткий для создания краткого содержания\\.",
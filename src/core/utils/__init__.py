@@ -5,6 +5,8 @@ from .video import extract_video_id, get_video_info
 from .rate_limit import check_rate_limit
 from .formatting import format_summary_for_telegram
 from .user import (
+    UserSnapshot,
+    get_user_snapshot,
     get_user_preferences,
     get_user_language,
     update_user_preferences,
@@ -24,6 +26,8 @@ from .audio_config import VOICE_MAP
 
 __all__ = [
     "handle_callback_exceptions",
+    "UserSnapshot",
+    "get_user_snapshot",
     "get_user_data",
     "extract_video_id",
     "get_video_info",
@@ -1,49 +1,46 @@
 """Rate limiting and usage tracking utilities."""
 
-from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
+import time
+from typing import Optional, Tuple
 from src.config import RATE_LIMIT_SECONDS, TIER_LIMITS
+from src.core.utils.shared_state import shared_state
 from src.database.db_manager import db_manager
 
-# Request rate limiting
-RATE_LIMIT: Dict[int, float] = {}
-
 
 async def check_rate_limit(user_id: int) -> bool:
-    """Check if user is rate limited for requests."""
-    current_time = datetime.now(timezone.utc).timestamp()
-    last_request = RATE_LIMIT.get(user_id, 0)
-
-    if current_time - last_request < RATE_LIMIT_SECONDS:
-        return False
+    """Check if user is rate limited for requests.
 
-    RATE_LIMIT[user_id] = current_time
-    return True
+    The last request is kept in shared state for RATE_LIMIT_SECONDS, so the
+    limit holds across all workers.
+    """
+    return await shared_state.add(f"rate_limit:{user_id}", time.time(), RATE_LIMIT_SECONDS)
 
 
-async def check_monthly_limit(user_id: int) -> Tuple[bool, Optional[str], Optional[int]]:
+async def check_monthly_limit(
+    user_id: int, snapshot=None
+) -> Tuple[bool, Optional[str], Optional[int]]:
     """Check if user has exceeded their monthly summary limit.
-    
+
+    Args:
+        user_id: Telegram user ID
+        snapshot: Optional UserSnapshot already loaded for this update
+
     Returns:
         Tuple[bool, Optional[str], Optional[int]]: (can_use, error_message, summaries_used)
     """
     try:
-        # Get user data
-        user_data = db_manager.get_user_data(user_id)
-        tier = user_data.get("premium", {}).get("tier", "free")
+        # Get this month's usage record
+        if snapshot is not None:
+            usage = db_manager.usage_record_from_data(snapshot.data)
+        else:
+            usage = db_manager.get_usage_record(user_id)
+        tier = usage["tier"]
         
         # Get tier limits
         tier_config = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
         monthly_limit = tier_config.get("monthly_summaries", 5)  # Default to 5 for safety
         
-        # Check summaries used this month
-        now = datetime.now(timezone.utc)
-        month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
-        
-        summaries_used = db_manager.count_user_summaries(
-            user_id=user_id,
-            start_date=month_start
-        )
+        summaries_used = usage["count"]
         
         if summaries_used >= monthly_limit:
             return False, f"Monthly limit of {monthly_limit} summaries reached for {tier} tier", summaries_used
@@ -4,8 +4,6 @@ import re
 import time
 import ipaddress
 from typing import Optional, Tuple, List
-from collections import defaultdict
-from datetime import datetime, timedelta
 import logging
 from telegram import Update
 from src.config import (
@@ -14,13 +12,10 @@ from src.config import (
     MAX_REQUESTS_PER_MINUTE,
     BLOCKED_PATTERNS,
 )
+from src.core.utils.shared_state import shared_state
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting storage
-user_requests = defaultdict(list)
-user_last_request = defaultdict(float)
-
 # Additional security patterns
 DANGEROUS_PATTERNS = [
     r"(?i)(select|insert|update|delete|drop|union|exec|declare).*",  # SQL injection
@@ -145,7 +140,7 @@ def check_blocked_patterns(text: str) -> Tuple[bool, Optional[str]]:
     return True, None
 
 
-def check_rate_limit(user_id: int) -> Tuple[bool, Optional[str]]:
+async def check_rate_limit(user_id: int) -> Tuple[bool, Optional[str]]:
     """Check if user has exceeded rate limits.
 
     Args:
@@ -156,30 +151,25 @@ def check_rate_limit(user_id: int) -> Tuple[bool, Optional[str]]:
     """
     current_time = time.time()
 
-    # Clean old requests
-    user_requests[user_id] = [
-        req_time for req_time in user_requests[user_id] if req_time > current_time - 60
-    ]
-
-    # Check requests per minute
-    if len(user_requests[user_id]) >= MAX_REQUESTS_PER_MINUTE:
+    # Check time between requests
+    last_key = f"security:last_request:{user_id}"
+    if not await shared_state.add(last_key, current_time, RATE_LIMIT_SECONDS):
+        last_request = await shared_state.get(last_key) or current_time
         return (
             False,
-            f"Rate limit exceeded. Maximum {MAX_REQUESTS_PER_MINUTE} requests per minute.",
+            f"Please wait {int(RATE_LIMIT_SECONDS - (current_time - last_request))} seconds",
         )
 
-    # Check time between requests
-    last_request = user_last_request[user_id]
-    if current_time - last_request < RATE_LIMIT_SECONDS:
+    # Check requests per minute, counted in shared state across all workers
+    if (
+        await shared_state.incr(f"security:minute:{user_id}", 60)
+        > MAX_REQUESTS_PER_MINUTE
+    ):
         return (
             False,
-            f"Please wait {int(RATE_LIMIT_SECONDS - (current_time - last_request))} seconds",
+            f"Rate limit exceeded. Maximum {MAX_REQUESTS_PER_MINUTE} requests per minute.",
         )
 
-    # Update rate limit tracking
-    user_requests[user_id].append(current_time)
-    user_last_request[user_id] = current_time
-
     return True, None
 
 
@@ -217,7 +207,7 @@ async def security_check(update: Update) -> Tuple[bool, Optional[str]]:
         user_id = update.effective_user.id
 
         # Check rate limits
-        is_allowed, error = check_rate_limit(user_id)
+        is_allowed, error = await check_rate_limit(user_id)
         if not is_allowed:
             return False, error
 
@@ -0,0 +1,261 @@
+"""Short-lived state shared by every worker of the bot.
+
+Rate limits, in-flight transcript fetches and cached summaries must be
+global when the bot runs as several uvicorn workers or Cloud Run
+instances; otherwise each process applies the limits on its own (N
+workers allow N times the traffic) and repeats work another one already
+did. SharedState is the small key-value API those callers use: JSON
+values with a time-to-live, an atomic set-if-absent and an atomic counter.
+Its methods are coroutines, so callers on the event loop never block on a
+network round trip.
+
+MemorySharedState keeps the state in the process, which is all a single
+worker needs. RedisSharedState keeps it in a server speaking the Redis
+protocol (Redis, Valkey, or a local stand-in for checks), selected with
+SHARED_STATE_BACKEND=redis.
+
+Errors from the backend are logged and the call behaves as if the state
+were empty, so an unreachable server fails open: limits allow the request
+and caches miss rather than the bot refusing every update.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import SHARED_STATE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    """Key-value store for state that must be the same in every worker.
+
+    Every entry expires after its ttl_seconds; a ttl of zero or less means
+    the entry expires at once, so nothing is stored.
+    """
+
+    # Whether other processes see the state, i.e. not just this worker
+    distributed = False
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under key, or None if missing or expired."""
+        try:
+            raw = await self._get(key)
+            return None if raw is None else json.loads(raw)
+        except Exception as e:
+            logger.error(f"Error reading shared state {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value under key for ttl_seconds."""
+        if ttl_seconds <= 0:
+            return
+        try:
+            await self._set(key, json.dumps(value), ttl_seconds, only_if_absent=False)
+        except Exception as e:
+            logger.error(f"Error writing shared state {key}: {e}")
+
+    async def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Store value under key only if no live entry exists.
+
+        Returns:
+            bool: Whether this call created the entry. Used to claim a key,
+                e.g. the right to make a request or to run a fetch
+        """
+        if ttl_seconds <= 0:
+            return True
+        try:
+            return await self._set(
+                key, json.dumps(value), ttl_seconds, only_if_absent=True
+            )
+        except Exception as e:
+            logger.error(f"Error writing shared state {key}: {e}")
+            return True
+
+    async def delete(self, key: str) -> None:
+        """Remove key if present."""
+        try:
+            await self._delete(key)
+        except Exception as e:
+            logger.error(f"Error deleting shared state {key}: {e}")
+
+    async def incr(self, key: str, ttl_seconds: float) -> int:
+        """Add one to the counter under key and return the new count.
+
+        The counter starts at zero and expires ttl_seconds after the
+        increment that created it, which makes it a fixed-window counter.
+        """
+        if ttl_seconds <= 0:
+            return 1
+        try:
+            return await self._incr(key, ttl_seconds)
+        except Exception as e:
+            logger.error(f"Error incrementing shared state {key}: {e}")
+            return 1
+
+    async def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def _set(
+        self, key: str, raw: str, ttl_seconds: float, only_if_absent: bool
+    ) -> bool:
+        raise NotImplementedError
+
+    async def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def _incr(self, key: str, ttl_seconds: float) -> int:
+        raise NotImplementedError
+
+
+class MemorySharedState(SharedState):
+    """Shared state held in this process, for a single worker.
+
+    Expired entries are dropped when read and swept every purge_interval
+    writes, so memory stays bounded by the keys live at any one time. The
+    operations never wait, so they run inline on the event loop.
+    """
+
+    def __init__(self, purge_interval: int = 1000):
+        self.purge_interval = purge_interval
+        # key -> (JSON value or counter, monotonic expiry time)
+        self._data: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key: str, now: float) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        self._data[key] = (value, expires_at)
+        self._writes += 1
+        if self._writes % self.purge_interval == 0:
+            now = time.monotonic()
+            for stale in [k for k, (_, exp) in self._data.items() if exp <= now]:
+                del self._data[stale]
+
+    async def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._live(key, time.monotonic())
+        return None if value is None else str(value)
+
+    async def _set(
+        self, key: str, raw: str, ttl_seconds: float, only_if_absent: bool
+    ) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if only_if_absent and self._live(key, now) is not None:
+                return False
+            self._store(key, raw, now + ttl_seconds)
+            return True
+
+    async def _delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    async def _incr(self, key: str, ttl_seconds: float) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                count, expires_at = 1, now + ttl_seconds
+            else:
+                count, expires_at = int(entry[0]) + 1, entry[1]
+            self._store(key, count, expires_at)
+            return count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisSharedState(SharedState):
+    """Shared state kept in a Redis-protocol server, visible to all workers.
+
+    Uses the asyncio client of redis-py, whose connections belong to the
+    event loop that opened them: use an instance from one loop only.
+
+    Args:
+        url: Server URL, e.g. redis://localhost:6379/0
+        key_prefix: Prepended to every key so several bots can share a server
+        socket_timeout: Seconds to wait for the server on connect and reply
+    """
+
+    distributed = True
+
+    def __init__(self, url: str, key_prefix: str = "", socket_timeout: float = 0.5):
+        # Imported here so the package is only needed with this backend
+        from redis import asyncio as redis
+
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    async def _get(self, key: str) -> Optional[str]:
+        return await self._client.get(self._key(key))
+
+    async def _set(
+        self, key: str, raw: str, ttl_seconds: float, only_if_absent: bool
+    ) -> bool:
+        return bool(
+            await self._client.set(
+                self._key(key),
+                raw,
+                px=max(1, int(ttl_seconds * 1000)),
+                nx=only_if_absent,
+            )
+        )
+
+    async def _delete(self, key: str) -> None:
+        await self._client.delete(self._key(key))
+
+    async def _incr(self, key: str, ttl_seconds: float) -> int:
+        # Create the counter with its expiry if missing, then increment, in one
+        # MULTI block so no counter is ever left without a TTL
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(key), 0, px=max(1, int(ttl_seconds * 1000)), nx=True)
+            pipe.incr(self._key(key))
+            results = await pipe.execute()
+        return int(results[1])
+
+
+def create_shared_state(config: Dict = SHARED_STATE_CONFIG) -> SharedState:
+    """Build the shared state backend selected in config.
+
+    Falls back to per-process state if the redis backend can't be set up.
+    """
+    backend = config.get("backend", "memory")
+    if backend == "redis":
+        try:
+            state = RedisSharedState(
+                config["redis_url"],
+                key_prefix=config.get("key_prefix", ""),
+                socket_timeout=config.get("socket_timeout_seconds", 0.5),
+            )
+            logger.info("Using Redis shared state")
+            return state
+        except Exception as e:
+            logger.error(f"Error initializing redis shared state, using memory: {e}")
+    elif backend != "memory":
+        logger.error(f"Unknown shared state backend {backend}, using memory")
+    return MemorySharedState()
+
+
+# Create a singleton instance
+shared_state = create_shared_state()
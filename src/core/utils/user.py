@@ -1,16 +1,85 @@
 """User-related utility functions."""
 
-from typing import Dict
+from typing import Dict, Optional
 from telegram.ext import ContextTypes
+from src.database.async_db_manager import async_db_manager
 from src.database.db_manager import db_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def get_user_preferences(user_id: int) -> dict:
-    """Get user preferences from database."""
+class UserSnapshot:
+    """A user's document, read once and shared by the helpers for one update.
+
+    Pass it to the helpers below (or get it with get_user_snapshot) to serve
+    language, preferences, premium status and limits without extra reads.
+    """
+
+    def __init__(self, user_id: int, data: Dict):
+        self.user_id = user_id
+        self.data = data
+
+    @classmethod
+    async def load_async(cls, user_id: int) -> "UserSnapshot":
+        """Read the user's document without blocking the event loop.
+
+        The first read of a month also rolls the usage record over.
+        """
+        data = await async_db_manager.get_user_data(user_id)
+        if db_manager.usage_needs_rollover(data):
+            try:
+                data["usage"] = await async_db_manager.roll_usage_period(user_id)
+            except Exception as e:
+                # The usage helpers fall back to stats.monthly
+                logger.error(f"Error rolling over usage record: {str(e)}")
+        return cls(user_id, data)
+
+    @property
+    def preferences(self) -> Dict:
+        return db_manager.preferences_from_data(self.data)
+
+    @property
+    def language(self) -> str:
+        return self.preferences.get("menu_language", "en")
+
+    @property
+    def notifications_enabled(self) -> bool:
+        return self.preferences.get("notifications_enabled", True)
+
+    @property
+    def premium(self) -> Dict:
+        return self.data.get("premium", {})
+
+    @property
+    def monthly_usage(self) -> Dict:
+        return db_manager.monthly_usage_from_data(self.data)
+
+    @property
+    def summary_limits(self) -> Dict:
+        return db_manager.summary_limits_from_data(self.data)
+
+
+async def get_user_snapshot(
+    context: ContextTypes.DEFAULT_TYPE, user_id: int
+) -> UserSnapshot:
+    """Get the user's snapshot for the current update, loading it once.
+
+    The snapshot is stored on the callback context, which python-telegram-bot
+    creates for every update, so it never outlives the update.
+    """
+    snapshot = getattr(context, "user_snapshot", None)
+    if snapshot is None or snapshot.user_id != user_id:
+        snapshot = await UserSnapshot.load_async(user_id)
+        context.user_snapshot = snapshot
+    return snapshot
+
+
+def get_user_preferences(user_id: int, snapshot: Optional[UserSnapshot] = None) -> dict:
+    """Get user preferences from the snapshot or database."""
     try:
+        if snapshot is not None:
+            return snapshot.preferences
         return db_manager.get_user_preferences(user_id)
     except Exception as e:
         logger.error(f"Error getting user preferences: {str(e)}")
@@ -21,9 +90,11 @@ def get_user_preferences(user_id: int) -> dict:
         }
 
 
-def get_user_language(user_id: int) -> str:
-    """Get user's current language preference from database."""
+def get_user_language(user_id: int, snapshot: Optional[UserSnapshot] = None) -> str:
+    """Get user's current language preference from the snapshot or database."""
     try:
+        if snapshot is not None:
+            return snapshot.language
         return db_manager.get_user_language(user_id)
     except Exception as e:
         logger.error(f"Error getting user language: {str(e)}")
@@ -38,27 +109,33 @@ def update_user_preferences(user_id: int, preferences: Dict) -> None:
         logger.error(f"Error updating user preferences: {str(e)}")
 
 
-def get_user_data(user_id: int) -> dict:
-    """Get user data from database."""
+def get_user_data(user_id: int, snapshot: Optional[UserSnapshot] = None) -> dict:
+    """Get user data from the snapshot or database."""
     try:
+        if snapshot is not None:
+            return snapshot.data
         return db_manager.get_user_data(user_id)
     except Exception as e:
         logger.error(f"Error getting user data: {str(e)}")
         return {"language": "en", "summary_length": "medium"}
 
 
-def get_monthly_usage(user_id: int) -> dict:
-    """Get user's monthly usage data from database."""
+def get_monthly_usage(user_id: int, snapshot: Optional[UserSnapshot] = None) -> dict:
+    """Get user's monthly usage data from the snapshot or database."""
     try:
+        if snapshot is not None:
+            return snapshot.monthly_usage
         return db_manager.get_monthly_usage(user_id)
     except Exception as e:
         logger.error(f"Error getting monthly usage: {str(e)}")
         return {"summaries_used": 0}
 
 
-def get_premium_status(user_id: int) -> dict:
-    """Get user's premium status from database."""
+def get_premium_status(user_id: int, snapshot: Optional[UserSnapshot] = None) -> dict:
+    """Get user's premium status from the snapshot or database."""
     try:
+        if snapshot is not None:
+            return snapshot.premium
         return db_manager.get_premium_status(user_id)
     except Exception as e:
         logger.error(f"Error getting premium status: {str(e)}")
@@ -73,12 +150,14 @@ def cancel_subscription(user_id: int) -> None:
         logger.error(f"Error canceling subscription: {str(e)}")
 
 
-def check_summary_limits(user_id: int) -> dict:
+def check_summary_limits(user_id: int, snapshot: Optional[UserSnapshot] = None) -> dict:
     """Check user's summary usage and limits.
 
     Returns dict with remaining summaries and limit info.
     """
     try:
+        if snapshot is not None:
+            return snapshot.summary_limits
         return db_manager.check_summary_limits(user_id)
     except Exception as e:
         logger.error(f"Error checking summary limits: {str(e)}")
@@ -108,14 +187,14 @@ def toggle_notifications(user_id: int) -> bool:
         return True
 
 
-def are_notifications_enabled(user_id: int) -> bool:
+def are_notifications_enabled(user_id: int, snapshot: Optional[UserSnapshot] = None) -> bool:
     """Check if notifications are enabled for user.
 
     Returns:
         bool: True if notifications are enabled, False otherwise
     """
     try:
-        preferences = get_user_preferences(user_id)
+        preferences = get_user_preferences(user_id, snapshot)
         return preferences.get("notifications_enabled", True)
     except Exception as e:
         logger.error(f"Error checking notifications status: {str(e)}")
@@ -1,7 +1,8 @@
 """Video-related utility functions."""
 
 import re
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 import aiohttp
 from src.config import GEMINI_API_KEY
 
@@ -26,6 +27,25 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+def content_source_id(url: str) -> Tuple[Optional[str], str]:
+    """Identify the content a link points to.
+
+    Returns:
+        Tuple[Optional[str], str]: The YouTube video ID (None for other
+            links), and the key for the content: the video ID, or else the
+            URL with scheme and host lowercased and the fragment dropped
+    """
+    url = url.strip()
+    if "youtube.com" in url or "youtu.be" in url:
+        video_id = extract_video_id(url)
+        if video_id:
+            return video_id, video_id
+    parts = urlsplit(url)
+    return None, urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, "")
+    )
+
+
 async def get_video_info(video_id: str) -> Optional[Dict]:
     """Get video information using YouTube Data API."""
     try:
@@ -1,3 +1,12 @@
 from .db_manager import DatabaseManager, db_manager
+from .async_db_manager import AsyncDatabaseManager, async_db_manager
+from .write_buffer import StatsWriteBuffer, stats_buffer
 
-__all__ = ["DatabaseManager", "db_manager"]
+__all__ = [
+    "DatabaseManager",
+    "db_manager",
+    "AsyncDatabaseManager",
+    "async_db_manager",
+    "StatsWriteBuffer",
+    "stats_buffer",
+]
@@ -0,0 +1,319 @@
+"""Async Firestore access for the hot paths of the bot.
+
+AsyncDatabaseManager mirrors the DatabaseManager methods that run on every
+update, built on firestore.AsyncClient so handlers can await them (and run
+several concurrently) without blocking the event loop. It shares the user
+document cache and the document helpers with db_manager, so both APIs see
+the same data; DatabaseManager stays the API for scripts and cold paths.
+"""
+
+import copy
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from firebase_admin import firestore, firestore_async
+
+from src.database.db_manager import (
+    DEFAULT_PREFERENCES,
+    FALLBACK_SUMMARY_LIMITS,
+    HISTORY_DOCUMENT,
+    LIMIT_COUNTERS,
+    USAGE_ARCHIVE_COLLECTION,
+    db_manager,
+    instrumented,
+)
+from src.database.storage import (
+    AsyncLocalClient,
+    LocalClient,
+    async_transactional,
+    project_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseManager:
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AsyncDatabaseManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Set up the async manager; the client is created on first use."""
+        if self._initialized:
+            return
+        # Firebase is initialized by db_manager
+        self.sync = db_manager
+        self.metrics = db_manager.metrics
+        self._db = None
+        self._initialized = True
+
+    @property
+    def db(self):
+        """Async Firestore client.
+
+        Created lazily so it binds to the running event loop rather than to
+        whichever loop (if any) existed at import time.
+        """
+        if self._db is None:
+            if isinstance(self.sync.db, LocalClient):
+                self._db = AsyncLocalClient(self.sync.db)
+            else:
+                self._db = firestore_async.client()
+        return self._db
+
+    def _get_user_doc(self, user_id: int):
+        """Get user document reference."""
+        return self.db.collection("users").document(str(user_id))
+
+    async def _read_user_document(self, user_id: int) -> Optional[Dict]:
+        """Read a user document through the shared user cache.
+
+        Returns None if the user does not exist.
+        """
+        cache = self.sync._user_cache
+        cached = cache.get(user_id)
+        self.metrics.log_cache_access("user_document", hit=cached is not None)
+        if cached is None:
+            user_doc = await self._get_user_doc(user_id).get()
+            if not user_doc.exists:
+                return None
+            cached = user_doc.to_dict()
+            cache.set(user_id, cached)
+        return copy.deepcopy(cached)
+
+    async def _read_user_fields(
+        self, user_id: int, field_paths: List[str]
+    ) -> Optional[Dict]:
+        """Read only the given field paths of a user document.
+
+        Uses the same caches as DatabaseManager._read_user_fields.
+        """
+        key = tuple(field_paths)
+        cached = self.sync._user_cache.get(user_id)
+        if cached is not None:
+            self.metrics.log_cache_access("user_fields", hit=True)
+            return project_fields(cached, field_paths)
+
+        field_cache = self.sync._field_cache
+        projections = field_cache.get(user_id) or {}
+        self.metrics.log_cache_access("user_fields", hit=key in projections)
+        if key not in projections:
+            snapshot = await self._get_user_doc(user_id).get(
+                field_paths=list(field_paths)
+            )
+            if not snapshot.exists:
+                return None
+            projections = {**projections, key: snapshot.to_dict()}
+            field_cache.set(user_id, projections)
+        return copy.deepcopy(projections[key])
+
+    @instrumented("read", "users")
+    async def get_user_data(self, user_id: int) -> Dict:
+        """Get all user data including preferences and premium status."""
+        try:
+            user_data = await self._read_user_document(user_id)
+            if user_data is None:
+                return self.sync.new_user_data()
+            return user_data
+        except Exception as e:
+            logger.error(f"Error getting user data: {e}")
+            return self.sync.fallback_user_data()
+
+    @instrumented("read", "users")
+    async def get_user_preferences(self, user_id: int) -> Dict:
+        """Get user's preferences."""
+        try:
+            user_data = await self._read_user_fields(user_id, ["preferences"])
+            if user_data is None:
+                return dict(DEFAULT_PREFERENCES)
+            return self.sync.preferences_from_data(user_data)
+        except Exception as e:
+            logger.error(f"Error getting user preferences: {e}")
+            return dict(DEFAULT_PREFERENCES)
+
+    @instrumented("read", "users")
+    async def get_user_language(self, user_id: int) -> str:
+        """Get user's current language preference."""
+        try:
+            user_data = await self._read_user_fields(
+                user_id, ["preferences.menu_language"]
+            )
+            if user_data is None:
+                return "en"
+            return user_data.get("preferences", {}).get("menu_language", "en")
+        except Exception as e:
+            logger.error(f"Error getting user language: {e}")
+            return "en"
+
+    @instrumented("write", "users")
+    async def roll_usage_period(self, user_id: int) -> Optional[Dict]:
+        """Start this month's usage record and archive closed months."""
+        user_ref = self._get_user_doc(user_id)
+
+        @async_transactional
+        async def roll(transaction):
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            record, updates, archive = self.sync.usage_rollover_writes(
+                snapshot.to_dict()
+            )
+            for year, months in archive.items():
+                archive_ref = (
+                    user_ref.collection(USAGE_ARCHIVE_COLLECTION).document(year)
+                )
+                transaction.set(archive_ref, months, merge=True)
+            transaction.update(user_ref, updates)
+            return record
+
+        record = await roll(self.db.transaction())
+        self.sync._invalidate_user(user_id)
+        return record
+
+    @instrumented("read", "users")
+    async def get_usage_record(self, user_id: int) -> Dict:
+        """Get this month's usage record: period, count, limit and tier."""
+        user_data = await self._read_user_fields(user_id, ["usage"])
+        if user_data is None:
+            return self.sync.new_usage_record()
+
+        if not self.sync.usage_needs_rollover(user_data):
+            return {**self.sync.new_usage_record(), **user_data["usage"]}
+        return (
+            await self.roll_usage_period(user_id) or self.sync.new_usage_record()
+        )
+
+    @instrumented("read", "users")
+    async def check_summary_limits(self, user_id: int) -> Dict:
+        """Check user's summary usage against their tier limits."""
+        try:
+            return self.sync.summary_limits_from_usage(
+                self.sync.monthly_usage_from_record(
+                    await self.get_usage_record(user_id)
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error checking summary limits: {str(e)}")
+            return dict(FALLBACK_SUMMARY_LIMITS)
+
+    @instrumented("write", "users")
+    async def increment_user_stats(
+        self, user_id: int, summary_type: str, processing_time: float
+    ) -> None:
+        """Increment user summary statistics server-side, without a read."""
+        try:
+            increments = self.sync.summary_stats_increments(
+                summary_type, processing_time
+            )
+            await self._get_user_doc(user_id).update(
+                {
+                    field: firestore.Increment(amount)
+                    for field, amount in increments.items()
+                }
+            )
+            self.sync._invalidate_user(user_id)
+        except Exception as e:
+            logger.error(f"Error incrementing user stats: {e}")
+
+    @instrumented("write", "users")
+    async def reserve_summary(self, user_id: int) -> Tuple[bool, Dict]:
+        """Count a summary against this month's limit before it is made.
+
+        The usage record is read and LIMIT_COUNTERS incremented in one
+        transaction, so several requests of a user (queued, or running on
+        different workers) cannot pass the limit together. Give the
+        reservation back with release_summary if no summary is delivered.
+        Users without a document yet (e.g. who never sent /start) get one
+        created with this summary counted.
+
+        Returns:
+            Tuple[bool, Dict]: Whether a summary was reserved (False only if
+                the limit is reached), and the usage record it was checked
+                against
+
+        Raises:
+            Exception: If the usage record can't be read or written, so the
+                caller reports an error rather than a reached limit
+        """
+        user_ref = self._get_user_doc(user_id)
+
+        @async_transactional
+        async def reserve(transaction):
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                user_data = self.sync.new_user_document(user_id)
+                for field in LIMIT_COUNTERS:
+                    section, name = field.split(".")
+                    user_data[section][name] = 1
+                transaction.set(user_ref, user_data)
+                return True, user_data["usage"]
+            record = self.sync.usage_record_from_data(snapshot.to_dict())
+            if record["count"] >= record["limit"]:
+                return False, record
+            transaction.update(
+                user_ref, {field: firestore.Increment(1) for field in LIMIT_COUNTERS}
+            )
+            return True, {**record, "count": record["count"] + 1}
+
+        try:
+            # Start this month's record first so the reservation counts in it
+            await self.get_usage_record(user_id)
+            return await reserve(self.db.transaction())
+        except Exception as e:
+            logger.error(f"Error reserving summary: {e}")
+            raise
+        finally:
+            self.sync._invalidate_user(user_id)
+
+    @instrumented("write", "users")
+    async def release_summary(self, user_id: int, record: Dict) -> None:
+        """Give back a summary reserved with reserve_summary.
+
+        Nothing is given back once the usage period of record has ended,
+        since the new period's count never included it.
+        """
+        user_ref = self._get_user_doc(user_id)
+
+        @async_transactional
+        async def release(transaction):
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return
+            usage = snapshot.to_dict().get("usage") or {}
+            if usage.get("period") != record["period"] or usage.get("count", 0) <= 0:
+                return
+            transaction.update(
+                user_ref, {field: firestore.Increment(-1) for field in LIMIT_COUNTERS}
+            )
+
+        try:
+            await release(self.db.transaction())
+            self.sync._invalidate_user(user_id)
+        except Exception as e:
+            logger.error(f"Error releasing reserved summary: {e}")
+
+    @instrumented("write", "history")
+    async def add_to_history(self, user_id: int, video_data: Dict) -> None:
+        """Add a summary to user's history in one transactional write."""
+        history_ref = (
+            self._get_user_doc(user_id).collection("history").document(HISTORY_DOCUMENT)
+        )
+        entry = self.sync.new_history_entry(video_data)
+
+        @async_transactional
+        async def push(transaction):
+            snapshot = await history_ref.get(transaction=transaction)
+            entries = (snapshot.to_dict() or {}).get("entries", [])
+            transaction.set(
+                history_ref, {"entries": self.sync.push_history_entry(entries, entry)}
+            )
+
+        await push(self.db.transaction())
+
+
+# Create a singleton instance
+async_db_manager = AsyncDatabaseManager()
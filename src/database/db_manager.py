@@ -1,10 +1,15 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+import copy
+import functools
+import inspect
 import time
+import uuid
 import warnings
-from src.config import TIER_LIMITS
+from src.config import DATABASE_CONFIG, TIER_LIMITS, USER_CACHE_CONFIG
+from src.database.storage import create_local_client, project_fields, transactional
 from src.logging import metrics_collector
 import logging
 
@@ -14,6 +19,95 @@ warnings.filterwarnings(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_PREFERENCES = {
+    "menu_language": "en",
+    "summary_language": "en",
+    "summary_length": "medium",
+    "audio_enabled": False,
+    "voice_gender": "female",
+    "voice_language": "en",
+    "notifications_enabled": True,
+}
+
+# Number of summaries kept in a user's history, and the document holding them
+HISTORY_SIZE = 10
+HISTORY_DOCUMENT = "recent"
+
+# Closed months of stats.monthly are rolled up into
+# users/{id}/usage_archive/{YYYY}, one document per year
+USAGE_ARCHIVE_COLLECTION = "usage_archive"
+
+# Counters the monthly limit checks read. They are always incremented at
+# once, never through the write-behind buffer, so a user cannot outrun a
+# flush and go past their limit
+LIMIT_COUNTERS = ("premium.summaries_used", "usage.count")
+
+# check_summary_limits result used when the user's document cannot be read
+FALLBACK_SUMMARY_LIMITS = {
+    "remaining_summaries": 0,
+    "total_limit": 5,
+    "has_reached_limit": True,
+    "tier": "free",
+    "summaries_used": 0,
+}
+
+
+def instrumented(operation_type: str, collection: str):
+    """Record every call of a database method in metrics_collector.
+
+    The call's latency goes into the method's latency histogram, along with
+    the number of documents involved: the length of a returned list, or 1.
+    Works on both sync and async methods.
+
+    Args:
+        operation_type: read, write, query or batch_write
+        collection: Collection the method works on
+    """
+
+    def decorator(method):
+        name = method.__qualname__
+
+        def record(start: float, result, success: bool) -> None:
+            metrics_collector.log_db_operation(
+                name,
+                operation_type,
+                collection,
+                time.perf_counter() - start,
+                doc_count=len(result) if isinstance(result, list) else 1,
+                success=success,
+            )
+
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result, success = None, False
+                try:
+                    result = await method(*args, **kwargs)
+                    success = True
+                    return result
+                finally:
+                    record(start, result, success)
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, success = None, False
+            try:
+                result = method(*args, **kwargs)
+                success = True
+                return result
+            finally:
+                record(start, result, success)
+
+        return wrapper
+
+    return decorator
+
+
 class DatabaseManager:
     _instance = None
     _initialized = False
@@ -24,82 +118,114 @@ class DatabaseManager:
         return cls._instance
 
     def __init__(self):
-        """Initialize Firestore client."""
+        """Initialize Firestore client, or the local store set in DATABASE_CONFIG."""
         if self._initialized:
             return
         try:
-            # Initialize Firebase if not already initialized
-            if not firebase_admin._apps:
-                cred = credentials.Certificate(
-                    "sumari-e218a-firebase-adminsdk-fbsvc-4237ee8346.json"
-                )
-                firebase_admin.initialize_app(cred)
-                logger.info("Firebase initialized successfully")
+            if DATABASE_CONFIG["backend"] == "firestore":
+                # Initialize Firebase if not already initialized
+                if not firebase_admin._apps:
+                    cred = credentials.Certificate(DATABASE_CONFIG["credentials_path"])
+                    firebase_admin.initialize_app(cred)
+                    logger.info("Firebase initialized successfully")
+
+                self.db = firestore.client()
+            else:
+                self.db = create_local_client(DATABASE_CONFIG)
+                logger.info(f"Using local {DATABASE_CONFIG['backend']} database backend")
 
-            self.db = firestore.client()
             self.metrics = metrics_collector
+            self._user_cache_instance = None
+            self._field_cache_instance = None
             self._initialized = True
             self.free_limit = TIER_LIMITS["free"]["monthly_summaries"]
         except Exception as e:
             logger.error(f"Error initializing Firebase: {str(e)}")
             raise
 
-    def _track_firestore_operation(
-        self,
-        operation_type: str,
-        collection: str,
-        doc_count: int = 1,
-        success: bool = True,
-        error: str = None,
-    ):
-        """Track Firestore operation metrics."""
-        try:
-            # Temporarily disabled Cloud Monitoring logging
-            pass
-        except Exception as e:
-            logger.error(f"Error logging metric to Cloud Monitoring: {str(e)}")
-            pass
+    # User Document Cache
+    @property
+    def _user_cache(self):
+        """TTL cache of user documents, created on first use."""
+        if self._user_cache_instance is None:
+            # Imported here because src.core imports this module
+            from src.core.utils.cache import TTLCache
+
+            self._user_cache_instance = TTLCache(
+                max_entries=USER_CACHE_CONFIG["max_entries"],
+                ttl_seconds=USER_CACHE_CONFIG["ttl_seconds"],
+            )
+        return self._user_cache_instance
+
+    @property
+    def _field_cache(self):
+        """TTL cache of projected reads, as {field paths: fields} per user."""
+        if self._field_cache_instance is None:
+            from src.core.utils.cache import TTLCache
+
+            self._field_cache_instance = TTLCache(
+                max_entries=USER_CACHE_CONFIG["max_entries"],
+                ttl_seconds=USER_CACHE_CONFIG["ttl_seconds"],
+            )
+        return self._field_cache_instance
+
+    def _read_user_document(self, user_id: int) -> Optional[Dict]:
+        """Read a user document, serving it from the user cache when fresh.
+
+        Returns None if the user does not exist. Callers get their own copy,
+        so mutating it never changes the cached document.
+        """
+        cached = self._user_cache.get(user_id)
+        self.metrics.log_cache_access("user_document", hit=cached is not None)
+        if cached is None:
+            user_doc = self._get_user_doc(user_id).get()
+            if not user_doc.exists:
+                return None
+            cached = user_doc.to_dict()
+            self._user_cache.set(user_id, cached)
+        return copy.deepcopy(cached)
+
+    def _read_user_fields(self, user_id: int, field_paths: List[str]) -> Optional[Dict]:
+        """Read only the given field paths of a user document.
+
+        Served from the cached full document when there is one, otherwise
+        from the field cache or a projected read (a Firestore field mask),
+        which skips the stats maps and everything else the caller does not
+        need. Returns None if the user does not exist.
+        """
+        key = tuple(field_paths)
+        cached = self._user_cache.get(user_id)
+        if cached is not None:
+            self.metrics.log_cache_access("user_fields", hit=True)
+            return project_fields(cached, field_paths)
+
+        projections = self._field_cache.get(user_id) or {}
+        self.metrics.log_cache_access("user_fields", hit=key in projections)
+        if key not in projections:
+            snapshot = self._get_user_doc(user_id).get(field_paths=list(field_paths))
+            if not snapshot.exists:
+                return None
+            projections = {**projections, key: snapshot.to_dict()}
+            self._field_cache.set(user_id, projections)
+        return copy.deepcopy(projections[key])
+
+    def _invalidate_user(self, user_id: int) -> None:
+        """Drop a user's cached document and fields after a write."""
+        self._user_cache.delete(user_id)
+        self._field_cache.delete(user_id)
 
     # User Management (minimal, just for tracking)
+    @instrumented("write", "users")
     def add_user(self, user_id: int) -> None:
         """Add a new user or update last seen."""
-        start_time = time.time()
         try:
             user_ref = self.db.collection("users").document(str(user_id))
             user_doc = user_ref.get()
-            self._track_firestore_operation("read", "users", start_time=start_time)
 
             if not user_doc.exists:
                 # Only set default data for new users
-                default_data = {
-                    "user_id": user_id,
-                    "created_at": firestore.SERVER_TIMESTAMP,
-                    "last_seen": firestore.SERVER_TIMESTAMP,
-                    "preferences": {
-                        "menu_language": "en",  # Default menu language
-                        "summary_length": "medium",  # Default summary length
-                        "summary_language": "en",  # Default summary language
-                        "audio_enabled": False,  # Default audio setting
-                        "voice_gender": "female",  # Default voice gender
-                        "voice_language": "en",  # Default voice language
-                        "notifications_enabled": True,  # Default notification setting
-                    },
-                    "stats": {
-                        "summaries_used": 0,
-                        "audio_summaries": 0,
-                        "total_processing_time": 0,
-                    },
-                    "premium": {
-                        "tier": "free",
-                        "active": True,
-                        "activation_date": datetime.now().isoformat(),
-                        "expiry_date": None,
-                        "summaries_limit": 5,  # 3 summaries per day for free tier
-                        "summaries_used": 0,
-                    },
-                }
-                user_ref.set(default_data)
-                self._track_firestore_operation("write", "users", start_time=start_time)
+                user_ref.set(self.new_user_document(user_id))
+                self._invalidate_user(user_id)
             else:
                 # For existing users, only update last_seen and ensure required fields exist
                 user_data = user_doc.to_dict()
@@ -144,28 +270,26 @@ class DatabaseManager:
                     }
 
                 user_ref.set(update_data, merge=True)
-                self._track_firestore_operation("write", "users", start_time=start_time)
+                self._invalidate_user(user_id)
         except Exception as e:
-            self._track_firestore_operation(
-                "read", "users", success=False, start_time=start_time
-            )
-            self.logger.error(f"Error adding/updating user: {e}")
+            logger.error(f"Error adding/updating user: {e}")
             raise
 
+    @instrumented("write", "users")
     def update_user_activity(self, user_id: int) -> None:
         """Update user's last activity timestamp."""
         user_ref = self.db.collection("users").document(str(user_id))
         user_ref.update({"last_seen": firestore.SERVER_TIMESTAMP})
 
-    def _reset_daily_stats_if_needed(self, user_ref) -> None:
+    def _reset_daily_stats_if_needed(self, user_id: int) -> None:
         """Reset daily stats if it's a new day."""
         today = datetime.now().strftime("%Y-%m-%d")
-        user_data = user_ref.get().to_dict()
+        user_data = self._read_user_fields(user_id, ["stats.daily.date"])
         if (
             not user_data
             or not user_data.get("stats", {}).get("daily", {}).get("date") == today
         ):
-            user_ref.update(
+            self._get_user_doc(user_id).update(
                 {
                     "stats.daily": {
                         "date": today,
@@ -175,76 +299,78 @@ class DatabaseManager:
                     }
                 }
             )
+            self._invalidate_user(user_id)
 
     # Summary History Management
-    def add_to_history(self, user_id: int, video_data: Dict) -> None:
-        """Add a summary to user's history."""
-        history_ref = (
-            self.db.collection("users")
-            .document(str(user_id))
-            .collection("history")
-            .document()
+    def _get_history_doc(self, user_id: int):
+        """Get the reference of the document holding a user's history ring."""
+        return self._get_user_doc(user_id).collection("history").document(
+            HISTORY_DOCUMENT
         )
 
-        video_data["created_at"] = firestore.SERVER_TIMESTAMP
-        history_ref.set(video_data)
+    @instrumented("write", "history")
+    def add_to_history(self, user_id: int, video_data: Dict) -> None:
+        """Add a summary to user's history.
+
+        The newest HISTORY_SIZE entries live in one document, so adding an
+        entry is a single transactional read and write of that document.
+        """
+        history_ref = self._get_history_doc(user_id)
+        entry = self.new_history_entry(video_data)
+
+        @transactional
+        def push(transaction):
+            snapshot = history_ref.get(transaction=transaction)
+            entries = (snapshot.to_dict() or {}).get("entries", [])
+            transaction.set(
+                history_ref, {"entries": self.push_history_entry(entries, entry)}
+            )
 
-        # Maintain history size limit
-        self._cleanup_old_history(user_id)
+        push(self.db.transaction())
 
+    @instrumented("read", "history")
     def get_user_history(self, user_id: int, limit: int = 10) -> List[Dict]:
-        """Get user's summary history."""
-        history_ref = (
-            self.db.collection("users")
-            .document(str(user_id))
-            .collection("history")
-            .order_by("created_at", direction=firestore.Query.DESCENDING)
-            .limit(limit)
-        )
+        """Get user's summary history, newest first."""
+        history_doc = self._get_history_doc(user_id).get()
+        if not history_doc.exists:
+            return []
+        return history_doc.to_dict().get("entries", [])[:limit]
 
-        history = []
-        for doc in history_ref.stream():
-            data = doc.to_dict()
-            data["id"] = doc.id
-            history.append(data)
+    @staticmethod
+    def new_history_entry(video_data: Dict) -> Dict:
+        """Build a history entry; server timestamps are not allowed in arrays."""
+        return {
+            **video_data,
+            "id": uuid.uuid4().hex,
+            "created_at": datetime.now(timezone.utc),
+        }
 
-        return history
+    @staticmethod
+    def push_history_entry(entries: List[Dict], entry: Dict) -> List[Dict]:
+        """Prepend entry to a history ring, dropping the oldest past HISTORY_SIZE."""
+        return [entry] + entries[: HISTORY_SIZE - 1]
 
     def _get_user_doc(self, user_id: int):
         """Get user document reference."""
         return self.db.collection("users").document(str(user_id))
 
+    @instrumented("read", "users")
     def get_user_language(self, user_id: int) -> str:
         """Get user's current language preference."""
         try:
-            user_ref = self._get_user_doc(user_id)
-            user_doc = user_ref.get()
+            data = self._read_user_fields(user_id, ["preferences.menu_language"])
 
-            if not user_doc.exists:
+            if data is None:
                 return "en"
 
-            data = user_doc.to_dict()
             preferences = data.get("preferences", {})
             return preferences.get("menu_language", "en")
         except Exception as e:
             logger.error(f"Error getting user language: {e}")
             return "en"
 
-    def _cleanup_old_history(self, user_id: int, max_size: int = 10) -> None:
-        """Remove old history entries if exceeding max_size."""
-        history_ref = (
-            self.db.collection("users")
-            .document(str(user_id))
-            .collection("history")
-            .order_by("created_at", direction=firestore.Query.DESCENDING)
-            .offset(max_size)
-        )
-
-        docs = history_ref.stream()
-        for doc in docs:
-            doc.reference.delete()
-
     # Usage Statistics
+    @instrumented("write", "users")
     def log_api_usage(
         self, user_id: int, api_name: str, status: str, details: Dict = None
     ) -> None:
@@ -252,7 +378,7 @@ class DatabaseManager:
         user_ref = self.db.collection("users").document(str(user_id))
 
         # Reset daily stats if needed
-        self._reset_daily_stats_if_needed(user_ref)
+        self._reset_daily_stats_if_needed(user_id)
 
         # Update usage statistics
         if status == "success":
@@ -279,69 +405,181 @@ class DatabaseManager:
                 )
 
             user_ref.update(updates)
-            self._track_firestore_operation("write", "users")
+            self._invalidate_user(user_id)
 
+    @instrumented("write", "users")
     def increment_user_stats(
         self, user_id: int, summary_type: str, processing_time: float
     ):
-        """Increment user summary statistics."""
+        """Increment user summary statistics.
+
+        The counters are incremented server-side, so concurrent summaries
+        never overwrite each other and no read is needed.
+        """
         try:
             user_ref = self.db.collection("users").document(str(user_id))
-            user_doc = user_ref.get()
+            increments = self.summary_stats_increments(summary_type, processing_time)
+            user_ref.update(
+                {
+                    field: firestore.Increment(amount)
+                    for field, amount in increments.items()
+                }
+            )
+            self._invalidate_user(user_id)
 
-            if not user_doc.exists:
-                return
+        except Exception as e:
+            logger.error(f"Error incrementing user stats: {e}")
 
-            user_data = user_doc.to_dict()
-            stats = user_data.get("stats", {})
+    @staticmethod
+    def summary_stats_increments(
+        summary_type: str, processing_time: float
+    ) -> Dict[str, float]:
+        """Counter increments for one summary, keyed by dotted field path."""
+        current_month = datetime.now().strftime("%Y-%m")
+        increments = {"usage.count": 1}
+        # Month keys contain "-", so they must be quoted in a field path
+        for scope in ("stats.total", f"stats.monthly.`{current_month}`"):
+            increments[f"{scope}.summaries_used"] = 1
+            increments[f"{scope}.total_processing_time"] = processing_time
+            if summary_type == "audio":
+                increments[f"{scope}.audio_summaries"] = 1
+        return increments
 
-            # Update total stats
-            total_stats = stats.get(
-                "total",
-                {"summaries_used": 0, "audio_summaries": 0, "total_processing_time": 0},
-            )
+    @instrumented("batch_write", "users")
+    def migrate_stats_counters(self, dry_run: bool = False) -> int:
+        """Normalize existing users' stats for server-side increments.
 
-            total_stats["summaries_used"] += 1
-            if summary_type == "audio":
-                total_stats["audio_summaries"] += 1
-            total_stats["total_processing_time"] += processing_time
-
-            # Update monthly stats
-            current_month = datetime.now().strftime("%Y-%m")
-            monthly_stats = stats.get("monthly", {})
-            current_month_stats = monthly_stats.get(
-                current_month,
-                {"summaries_used": 0, "audio_summaries": 0, "total_processing_time": 0},
-            )
+        increment_user_stats now increments dotted paths such as
+        stats.monthly.2026-10.summaries_used without reading the document,
+        so stats, stats.total and every month entry must be maps and every
+        counter a number. Documents where that does not hold (missing or
+        null maps, counters stored as null or strings) are rewritten with
+        the same totals in the expected shape.
 
-            current_month_stats["summaries_used"] += 1
-            if summary_type == "audio":
-                current_month_stats["audio_summaries"] += 1
-            current_month_stats["total_processing_time"] += processing_time
+        Args:
+            dry_run: Only count the documents that need migrating
 
-            monthly_stats[current_month] = current_month_stats
+        Returns:
+            int: Number of documents migrated (or needing migration)
+        """
+        counters = ("summaries_used", "audio_summaries", "total_processing_time")
+
+        def normalize(entry) -> Dict:
+            entry = entry if isinstance(entry, dict) else {}
+            normalized = dict(entry)
+            for counter in counters:
+                value = entry.get(counter, 0)
+                try:
+                    number = float(value or 0)
+                except (TypeError, ValueError):
+                    number = 0
+                if counter != "total_processing_time":
+                    number = int(number)
+                normalized[counter] = number
+            return normalized
+
+        migrated = 0
+        batch = self.db.batch()
+        pending = 0
+        for doc in self.db.collection("users").stream():
+            stats = doc.to_dict().get("stats")
+            stats = stats if isinstance(stats, dict) else {}
+            monthly = stats.get("monthly")
+            monthly = monthly if isinstance(monthly, dict) else {}
+
+            normalized = {
+                **stats,
+                "total": normalize(stats.get("total")),
+                "monthly": {month: normalize(entry) for month, entry in monthly.items()},
+            }
+            if normalized == stats:
+                continue
+
+            migrated += 1
+            if dry_run:
+                continue
+            batch.update(doc.reference, {"stats": normalized})
+            pending += 1
+            if pending == 400:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
+        self._user_cache.clear()
+        self._field_cache.clear()
+        logger.info(
+            f"{'Found' if dry_run else 'Migrated'} {migrated} user documents "
+            "for server-side stats counters"
+        )
+        return migrated
 
-            # Update document
-            user_ref.update(
-                {
-                    "stats.total": total_stats,
-                    "stats.monthly": monthly_stats,
-                }
-            )
+    @instrumented("batch_write", "history")
+    def migrate_history_documents(self, dry_run: bool = False) -> int:
+        """Fold per-summary history documents into the history ring.
 
-        except Exception as e:
-            logger.error(f"Error incrementing user stats: {e}")
+        History used to be one document per summary under
+        users/{id}/history; it now lives in the HISTORY_DOCUMENT ring only.
+        For every user with old documents, the newest HISTORY_SIZE entries
+        (old documents and ring entries together) are written to the ring
+        and the old documents are deleted, in one transaction per user.
+
+        Args:
+            dry_run: Only count the users that need migrating
 
+        Returns:
+            int: Number of users migrated (or needing migration)
+        """
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+
+        def created_at(entry: Dict) -> datetime:
+            value = entry.get("created_at")
+            if not isinstance(value, datetime):
+                return oldest
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+        migrated = 0
+        for user_doc in self.db.collection("users").stream():
+            history_ref = user_doc.reference.collection("history")
+            ring_ref = history_ref.document(HISTORY_DOCUMENT)
+
+            @transactional
+            def fold(transaction) -> bool:
+                legacy = [
+                    doc
+                    for doc in history_ref.stream(transaction=transaction)
+                    if doc.id != HISTORY_DOCUMENT
+                ]
+                if not legacy or dry_run:
+                    return bool(legacy)
+                ring = ring_ref.get(transaction=transaction)
+                entries = (ring.to_dict() or {}).get("entries", []) + [
+                    {**doc.to_dict(), "id": doc.id} for doc in legacy
+                ]
+                entries.sort(key=created_at, reverse=True)
+                transaction.set(ring_ref, {"entries": entries[:HISTORY_SIZE]})
+                for doc in legacy:
+                    transaction.delete(doc.reference)
+                return True
+
+            if fold(self.db.transaction()):
+                migrated += 1
+
+        logger.info(
+            f"{'Found' if dry_run else 'Migrated'} {migrated} users "
+            "with per-summary history documents"
+        )
+        return migrated
+
+    @instrumented("read", "users")
     def get_user_usage_stats(self, user_id: int, timeframe_hours: int = 24) -> Dict:
         """Get user's API usage statistics from the user document."""
-        user_ref = self.db.collection("users").document(str(user_id))
-        user_data = user_ref.get()
-        self._track_firestore_operation("read", "users")
+        user_dict = self._read_user_fields(user_id, ["stats.daily", "stats.total"])
 
-        if not user_data.exists:
+        if user_dict is None:
             return {"total": 0, "success": 0, "failed": 0}
 
-        user_dict = user_data.to_dict()
         stats = user_dict.get("stats", {})
 
         # Get current month's stats
@@ -368,115 +606,301 @@ class DatabaseManager:
             "total_processing_time": total_stats.get("total_processing_time", 0),
         }
 
+    @instrumented("read", "users")
     def get_user_data(self, user_id: int) -> Dict:
         """Get all user data including preferences and premium status."""
         try:
-            user_ref = self.db.collection("users").document(str(user_id))
-            user_doc = user_ref.get()
+            user_data = self._read_user_document(user_id)
 
-            if not user_doc.exists:
+            if user_data is None:
                 # Return default data for new users
-                return {
-                    "preferences": {
-                        "menu_language": "en",
-                        "summary_language": "en",
-                        "summary_length": "medium",
-                        "audio_enabled": False,
-                        "voice_gender": "female",
-                        "voice_language": "en",
-                    },
-                    "premium": {
-                        "tier": "free",
-                        "active": True,
-                        "summaries_limit": 5,
-                        "summaries_used": 0,
-                    },
-                    "stats": {
-                        "monthly": {},
-                        "daily": {
-                            "date": datetime.now().strftime("%Y-%m-%d"),
-                            "summaries_used": 0,
-                            "audio_summaries": 0,
-                            "total_processing_time": 0,
-                        },
-                        "total": {
-                            "summaries_used": 0,
-                            "audio_summaries": 0,
-                            "total_processing_time": 0,
-                        },
-                    },
-                }
+                return self.new_user_data()
 
-            return user_doc.to_dict()
+            return user_data
 
         except Exception as e:
             logger.error(f"Error getting user data: {e}")
             # Return safe default data
-            return {
-                "preferences": {"menu_language": "en", "summary_length": "medium"},
-                "premium": {
-                    "tier": "free",
-                    "active": True,
-                    "summaries_limit": 5,
+            return self.fallback_user_data()
+
+    @classmethod
+    def new_user_data(cls) -> Dict:
+        """Default get_user_data result for users without a document."""
+        return {
+            "preferences": {
+                "menu_language": "en",
+                "summary_language": "en",
+                "summary_length": "medium",
+                "audio_enabled": False,
+                "voice_gender": "female",
+                "voice_language": "en",
+            },
+            "premium": {
+                "tier": "free",
+                "active": True,
+                "summaries_limit": 5,
+                "summaries_used": 0,
+            },
+            "stats": {
+                "monthly": {},
+                "daily": {
+                    "date": datetime.now().strftime("%Y-%m-%d"),
                     "summaries_used": 0,
+                    "audio_summaries": 0,
+                    "total_processing_time": 0,
                 },
-                "stats": {"monthly": {}, "daily": {}, "total": {}},
+                "total": {
+                    "summaries_used": 0,
+                    "audio_summaries": 0,
+                    "total_processing_time": 0,
+                },
+            },
+            "usage": cls.new_usage_record(),
+        }
+
+    @classmethod
+    def fallback_user_data(cls) -> Dict:
+        """Safe get_user_data result when the document cannot be read."""
+        return {
+            "preferences": {"menu_language": "en", "summary_length": "medium"},
+            "premium": {
+                "tier": "free",
+                "active": True,
+                "summaries_limit": 5,
+                "summaries_used": 0,
+            },
+            "stats": {"monthly": {}, "daily": {}, "total": {}},
+            "usage": cls.new_usage_record(),
+        }
+
+    # Monthly Usage
+    @classmethod
+    def new_user_document(cls, user_id: int) -> Dict:
+        """Document created for a user the first time they are seen."""
+        return {
+            "user_id": user_id,
+            "created_at": firestore.SERVER_TIMESTAMP,
+            "last_seen": firestore.SERVER_TIMESTAMP,
+            "preferences": {
+                "menu_language": "en",  # Default menu language
+                "summary_length": "medium",  # Default summary length
+                "summary_language": "en",  # Default summary language
+                "audio_enabled": False,  # Default audio setting
+                "voice_gender": "female",  # Default voice gender
+                "voice_language": "en",  # Default voice language
+                "notifications_enabled": True,  # Default notification setting
+            },
+            "stats": {
+                "summaries_used": 0,
+                "audio_summaries": 0,
+                "total_processing_time": 0,
+            },
+            "premium": {
+                "tier": "free",
+                "active": True,
+                "activation_date": datetime.now().isoformat(),
+                "expiry_date": None,
+                "summaries_limit": 5,  # 3 summaries per day for free tier
+                "summaries_used": 0,
+            },
+            "usage": cls.new_usage_record(),
+        }
+
+    @staticmethod
+    def new_usage_record(tier: str = "free", limit: int = 5) -> Dict:
+        """Usage record for the current month with nothing used yet."""
+        return {
+            "period": datetime.now().strftime("%Y-%m"),
+            "count": 0,
+            "limit": limit,
+            "tier": tier,
+        }
+
+    @staticmethod
+    def usage_needs_rollover(user_data: Dict) -> bool:
+        """Check whether a user document's usage record is not for this month."""
+        usage = user_data.get("usage") or {}
+        return usage.get("period") != datetime.now().strftime("%Y-%m")
+
+    @classmethod
+    def usage_record_from_data(cls, user_data: Dict) -> Dict:
+        """Get this month's usage record from a user document.
+
+        Documents whose record has not been rolled over to this month yet
+        get one computed from stats.monthly, which increment_user_stats
+        keeps in step with usage.count.
+        """
+        if not cls.usage_needs_rollover(user_data):
+            return {**cls.new_usage_record(), **user_data["usage"]}
+
+        premium = user_data.get("premium", {})
+        record = cls.new_usage_record(
+            premium.get("tier", "free"), premium.get("summaries_limit", 5)
+        )
+        monthly_stats = user_data.get("stats", {}).get("monthly", {})
+        record["count"] = monthly_stats.get(record["period"], {}).get(
+            "summaries_used", 0
+        )
+        return record
+
+    @classmethod
+    def usage_rollover_writes(cls, user_data: Dict):
+        """Writes that start a new usage period for a user document.
+
+        Returns:
+            Tuple of the new usage record, the update for the user document
+            (the record, and deletion of every closed month in stats.monthly)
+            and the archived months to merge into each year's archive
+            document, as {year: {"months": {month: counter increments}}}.
+        """
+        record = cls.usage_record_from_data(user_data)
+        updates = {"usage": record}
+        archive = {}
+        monthly_stats = user_data.get("stats", {}).get("monthly", {})
+        for month, entry in monthly_stats.items():
+            if month >= record["period"] or not isinstance(entry, dict):
+                continue
+            updates[f"stats.monthly.`{month}`"] = firestore.DELETE_FIELD
+            # Increments, so a month archived twice (after a late write) adds up
+            archive.setdefault(month[:4], {"months": {}})["months"][month] = {
+                counter: (
+                    firestore.Increment(value)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                    else value
+                )
+                for counter, value in entry.items()
             }
+        return record, updates, archive
+
+    def _get_usage_archive_doc(self, user_id: int, year: str):
+        """Get the reference of a user's usage archive document for a year."""
+        return (
+            self._get_user_doc(user_id)
+            .collection(USAGE_ARCHIVE_COLLECTION)
+            .document(year)
+        )
+
+    @instrumented("write", "users")
+    def roll_usage_period(self, user_id: int) -> Optional[Dict]:
+        """Start this month's usage record and archive closed months.
+
+        Runs in a transaction, so increments that land during the rollover
+        are never lost. Returns the new record, or None if the user does
+        not exist.
+        """
+        user_ref = self._get_user_doc(user_id)
+
+        @transactional
+        def roll(transaction):
+            snapshot = user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            record, updates, archive = self.usage_rollover_writes(snapshot.to_dict())
+            for year, months in archive.items():
+                transaction.set(
+                    self._get_usage_archive_doc(user_id, year), months, merge=True
+                )
+            transaction.update(user_ref, updates)
+            return record
 
+        record = roll(self.db.transaction())
+        self._invalidate_user(user_id)
+        return record
+
+    @instrumented("read", "users")
+    def get_usage_record(self, user_id: int) -> Dict:
+        """Get this month's usage record: period, count, limit and tier.
+
+        Reads only the usage field, and rolls the record over on the first
+        read of a month.
+        """
+        user_data = self._read_user_fields(user_id, ["usage"])
+        if user_data is None:
+            return self.new_usage_record()
+
+        if not self.usage_needs_rollover(user_data):
+            return {**self.new_usage_record(), **user_data["usage"]}
+        return self.roll_usage_period(user_id) or self.new_usage_record()
+
+    @instrumented("read", "users")
     def get_monthly_usage(self, user_id: int) -> Dict:
         """Get user's monthly usage data."""
         try:
-            user_data = self.get_user_data(user_id)
-            premium = user_data.get("premium", {})
-
-            # Get monthly usage
-            stats = user_data.get("stats", {})
-            current_month = datetime.now().strftime("%Y-%m")
-            monthly_stats = stats.get("monthly", {})
-            current_month_stats = monthly_stats.get(
-                current_month, {"summaries_used": 0}
-            )
-
-            return {
-                "summaries_used": current_month_stats["summaries_used"],
-                "summaries_limit": premium.get("summaries_limit", 5),
-                "tier": premium.get("tier", "free"),
-            }
+            return self.monthly_usage_from_record(self.get_usage_record(user_id))
 
         except Exception as e:
             logger.error(f"Error getting monthly usage: {e}")
             return {"summaries_used": 0, "summaries_limit": 5, "tier": "free"}
 
-    def count_user_summaries(self, user_id: int, start_date: datetime) -> int:
-        """Get number of summaries used by user in current month."""
-        try:
-            user_doc = self.db.collection("users").document(str(user_id)).get()
-            if not user_doc.exists:
-                return 0
+    @classmethod
+    def monthly_summaries_from_data(cls, user_data: Dict) -> int:
+        """Get the number of summaries used this month from a user document."""
+        return cls.usage_record_from_data(user_data)["count"]
 
-            user_data = user_doc.to_dict()
-            stats = user_data.get("stats", {})
-            current_month = datetime.now().strftime("%Y-%m")
+    @staticmethod
+    def monthly_usage_from_record(record: Dict) -> Dict:
+        """Get monthly usage, limit and tier from a usage record."""
+        return {
+            "summaries_used": record["count"],
+            "summaries_limit": record["limit"],
+            "tier": record["tier"],
+        }
 
-            # Get monthly stats
-            monthly_stats = stats.get("monthly", {})
-            current_month_stats = monthly_stats.get(
-                current_month, {"summaries_used": 0}
-            )
+    @classmethod
+    def monthly_usage_from_data(cls, user_data: Dict) -> Dict:
+        """Get monthly usage, limit and tier from a user document."""
+        return cls.monthly_usage_from_record(cls.usage_record_from_data(user_data))
 
-            return current_month_stats["summaries_used"]
+    @instrumented("read", "users")
+    def count_user_summaries(self, user_id: int, start_date: datetime) -> int:
+        """Get number of summaries used by user in current month."""
+        try:
+            return self.get_usage_record(user_id)["count"]
 
         except Exception as e:
             logger.error(f"Error getting user summary count: {str(e)}")
             return 0
 
+    @instrumented("batch_write", "users")
+    def migrate_usage_records(self, dry_run: bool = False) -> int:
+        """Give every user a current usage record and archive closed months.
+
+        Users are otherwise rolled over on their first limit check of a
+        month; this catches up the ones that have not been seen since.
+
+        Args:
+            dry_run: Only count the documents that need migrating
+
+        Returns:
+            int: Number of documents migrated (or needing migration)
+        """
+        current_month = datetime.now().strftime("%Y-%m")
+        migrated = 0
+        for doc in self.db.collection("users").stream():
+            user_data = doc.to_dict()
+            monthly_stats = user_data.get("stats", {}).get("monthly", {})
+            if not self.usage_needs_rollover(user_data) and all(
+                month >= current_month for month in monthly_stats
+            ):
+                continue
+
+            migrated += 1
+            if not dry_run:
+                self.roll_usage_period(int(doc.id))
+
+        logger.info(
+            f"{'Found' if dry_run else 'Migrated'} {migrated} user documents "
+            "for compact usage records"
+        )
+        return migrated
+
+    @instrumented("write", "subscriptions")
     def store_subscription(self, subscription_data: Dict) -> None:
         """Store or update a subscription record in Firestore.
 
         Args:
             subscription_data: Dictionary containing subscription details
         """
-        start_time = time.time()
         try:
             sub_ref = self.db.collection("subscriptions").document(
                 subscription_data["id"]
@@ -527,16 +951,11 @@ class DatabaseManager:
                 },
                 merge=True,
             )
-            self._track_firestore_operation(
-                "write", "subscriptions", start_time=start_time
-            )
         except Exception as e:
-            self._track_firestore_operation(
-                "write", "subscriptions", success=False, start_time=start_time
-            )
             logger.error(f"Error storing subscription: {e}")
             raise
 
+    @instrumented("query", "subscriptions")
     def get_user_subscription(self, user_id: int) -> Optional[Dict]:
         """Get the current active subscription for a user.
 
@@ -546,7 +965,6 @@ class DatabaseManager:
         Returns:
             Dictionary containing subscription details or None if no active subscription
         """
-        start_time = time.time()
         try:
             sub_refs = (
                 self.db.collection("subscriptions")
@@ -556,22 +974,14 @@ class DatabaseManager:
             )
 
             for doc in sub_refs.stream():
-                self._track_firestore_operation(
-                    "read", "subscriptions", start_time=start_time
-                )
                 return doc.to_dict()
-            self._track_firestore_operation(
-                "read", "subscriptions", start_time=start_time
-            )
             return None
 
         except Exception as e:
-            self._track_firestore_operation(
-                "read", "subscriptions", success=False, start_time=start_time
-            )
             logger.error(f"Error retrieving user subscription: {e}")
             return None
 
+    @instrumented("query", "subscriptions")
     def get_subscription_history(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get subscription history for a user.
 
@@ -599,6 +1009,7 @@ class DatabaseManager:
             logger.error(f"Error retrieving subscription history: {e}")
             return []
 
+    @instrumented("write", "users")
     def cancel_subscription(
         self, user_id: int, cancel_at_period_end: bool = True
     ) -> bool:
@@ -636,6 +1047,7 @@ class DatabaseManager:
 
             # Update in database
             user_ref.update({"premium": premium_data})
+            self._invalidate_user(user_id)
 
             # Update the subscription in payment provider records
             sub_ref = (
@@ -667,62 +1079,33 @@ class DatabaseManager:
             logger.error(f"Error cancelling subscription: {e}", exc_info=True)
             return False
 
+    @instrumented("read", "users")
     def get_user_preferences(self, user_id: int) -> Dict:
         """Get user's preferences."""
         try:
-            user_ref = self.db.collection("users").document(str(user_id))
-            user_data = user_ref.get()
-
-            if not user_data.exists:
-                return {
-                    "menu_language": "en",
-                    "summary_language": "en",
-                    "summary_length": "medium",
-                    "audio_enabled": False,
-                    "voice_gender": "female",
-                    "voice_language": "en",
-                    "notifications_enabled": True,
-                }
-
-            user_dict = user_data.to_dict()
-            preferences = user_dict.get("preferences", {})
-
-            # Ensure all preference fields exist with defaults
-            default_preferences = {
-                "menu_language": "en",
-                "summary_language": "en",
-                "summary_length": "medium",
-                "audio_enabled": False,
-                "voice_gender": "female",
-                "voice_language": "en",
-                "notifications_enabled": True,
-            }
+            user_data = self._read_user_fields(user_id, ["preferences"])
 
-            # Update preferences with defaults for missing keys
-            for key, default_value in default_preferences.items():
-                if key not in preferences:
-                    preferences[key] = default_value
+            if user_data is None:
+                return dict(DEFAULT_PREFERENCES)
 
-            return preferences
+            return self.preferences_from_data(user_data)
         except Exception as e:
             logger.error(f"Error getting user preferences: {e}")
-            return {
-                "menu_language": "en",
-                "summary_language": "en",
-                "summary_length": "medium",
-                "audio_enabled": False,
-                "voice_gender": "female",
-                "voice_language": "en",
-                "notifications_enabled": True,
-            }
+            return dict(DEFAULT_PREFERENCES)
+
+    @staticmethod
+    def preferences_from_data(user_data: Dict) -> Dict:
+        """Get preferences from a user document, filling in missing defaults."""
+        return {**DEFAULT_PREFERENCES, **user_data.get("preferences", {})}
 
+    @instrumented("write", "users")
     def update_user_preferences(self, user_id: int, preferences: Dict) -> None:
         """Update user's preferences."""
         try:
             user_ref = self.db.collection("users").document(str(user_id))
 
             # Get current preferences
-            current_data = user_ref.get().to_dict() or {}
+            current_data = user_ref.get(field_paths=["preferences"]).to_dict() or {}
             current_preferences = current_data.get("preferences", {})
 
             # Ensure we're not nesting preferences
@@ -741,14 +1124,20 @@ class DatabaseManager:
             # Set without merge to avoid nesting
             user_ref.update({"preferences": updated_preferences})
 
-            # Track the update
-            self._track_firestore_operation("write", "users")
+            # Write the new preferences through to the cached document
+            cached = self._user_cache.get(user_id)
+            self._invalidate_user(user_id)
+            if cached is not None:
+                self._user_cache.set(
+                    user_id, {**cached, "preferences": updated_preferences}
+                )
 
         except Exception as e:
             logger.error(f"Error updating user preferences: {e}")
             raise
 
     # Error Tracking
+    @instrumented("write", "errors")
     def log_error(
         self, error_type: str, error_message: str, user_id: Optional[int] = None
     ) -> None:
@@ -763,6 +1152,7 @@ class DatabaseManager:
         error_ref.set(error_data)
 
     # Payment Management
+    @instrumented("write", "payments")
     def log_payment_attempt(
         self,
         user_id: int,
@@ -784,6 +1174,7 @@ class DatabaseManager:
         }
         payment_ref.set(payment_data)
 
+    @instrumented("write", "payments")
     def log_successful_payment(
         self, user_id: int, tier: str, amount: int, currency: str
     ) -> None:
@@ -802,6 +1193,7 @@ class DatabaseManager:
                 {"status": "completed", "completed_at": firestore.SERVER_TIMESTAMP}
             )
 
+    @instrumented("write", "users")
     def update_premium_status(self, user_id: int, premium_data: Dict) -> None:
         """Update user's premium status with all necessary fields."""
         user_ref = self.db.collection("users").document(str(user_id))
@@ -824,11 +1216,16 @@ class DatabaseManager:
                 "activation_date": firestore.SERVER_TIMESTAMP,
                 "summaries_used": 0,  # Reset summaries used when upgrading
             },
+            "usage": {
+                "tier": premium_data["tier"],
+                "limit": premium_data.get("summaries_limit", 5),
+            },
             "last_seen": firestore.SERVER_TIMESTAMP,
         }
 
         # Update the document
         user_ref.set(update_data, merge=True)
+        self._invalidate_user(user_id)
 
         # Log the premium status change
         self.metrics.log_premium_status_change(
@@ -838,22 +1235,24 @@ class DatabaseManager:
             active=premium_data["active"],
         )
 
+    @instrumented("read", "users")
     def get_premium_status(self, user_id: int) -> Optional[Dict]:
         """Get user's premium status."""
-        user_ref = self.db.collection("users").document(str(user_id))
-        user_data = user_ref.get()
+        user_data = self._read_user_fields(user_id, ["premium"])
 
-        if not user_data.exists:
+        if user_data is None:
             return None
 
-        user_dict = user_data.to_dict()
-        return user_dict.get("premium")
+        return user_data.get("premium")
 
+    @instrumented("write", "users")
     def increment_summaries_used(self, user_id: int) -> None:
         """Increment the number of summaries used by a premium user."""
         user_ref = self.db.collection("users").document(str(user_id))
         user_ref.update({"premium.summaries_used": firestore.Increment(1)})
+        self._invalidate_user(user_id)
 
+    @instrumented("read", "users")
     def check_summary_limits(self, user_id: int) -> Dict:
         """Check user's summary usage against their tier limits.
 
@@ -866,41 +1265,33 @@ class DatabaseManager:
             - summaries_used: int
         """
         try:
-            user_data = self.get_user_data(user_id)
-            premium = user_data.get("premium", {})
-            stats = user_data.get("stats", {})
-
-            # Get current month's usage
-            current_month = datetime.now().strftime("%Y-%m")
-            monthly_stats = stats.get("monthly", {})
-            current_month_stats = monthly_stats.get(
-                current_month, {"summaries_used": 0}
+            return self.summary_limits_from_usage(
+                self.monthly_usage_from_record(self.get_usage_record(user_id))
             )
 
-            summaries_used = current_month_stats.get("summaries_used", 0)
-            summaries_limit = premium.get(
-                "summaries_limit", 5
-            )  # Default to free tier limit
-            tier = premium.get("tier", "free")
-
-            return {
-                "remaining_summaries": max(0, summaries_limit - summaries_used),
-                "total_limit": summaries_limit,
-                "has_reached_limit": summaries_used >= summaries_limit,
-                "tier": tier,
-                "summaries_used": summaries_used,
-            }
-
         except Exception as e:
             logger.error(f"Error checking summary limits: {str(e)}")
             # Return safe defaults
-            return {
-                "remaining_summaries": 0,
-                "total_limit": 5,
-                "has_reached_limit": True,
-                "tier": "free",
-                "summaries_used": 0,
-            }
+            return dict(FALLBACK_SUMMARY_LIMITS)
+
+    @classmethod
+    def summary_limits_from_data(cls, user_data: Dict) -> Dict:
+        """Compute the check_summary_limits result from a user document."""
+        return cls.summary_limits_from_usage(cls.monthly_usage_from_data(user_data))
+
+    @staticmethod
+    def summary_limits_from_usage(usage: Dict) -> Dict:
+        """Compute the check_summary_limits result from monthly usage."""
+        summaries_used = usage["summaries_used"]
+        summaries_limit = usage["summaries_limit"]  # Defaults to free tier limit
+
+        return {
+            "remaining_summaries": max(0, summaries_limit - summaries_used),
+            "total_limit": summaries_limit,
+            "has_reached_limit": summaries_used >= summaries_limit,
+            "tier": usage["tier"],
+            "summaries_used": summaries_used,
+        }
 
 
 # Create a singleton instance
@@ -0,0 +1,671 @@
+"""Local, Firestore-compatible document storage.
+
+LocalClient implements the part of the google-cloud-firestore client API
+that the database managers use: collections and documents, set (with
+merge), update with dotted field paths, queries with where / order_by /
+limit / offset, batches, transactions, field masks and the Increment,
+SERVER_TIMESTAMP, DELETE_FIELD, ArrayUnion and ArrayRemove transforms.
+Documents are kept in a StorageBackend keyed by their full path, either in
+memory or in SQLite, so the bot can be run, load-tested and benchmarked
+without a GCP project. Select it with DATABASE_CONFIG["backend"].
+
+Use the transactional / async_transactional decorators from this module
+instead of Firestore's so transactions run on every backend.
+"""
+
+import asyncio
+import copy
+import functools
+import json
+import operator
+import os
+import random
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import Aborted, NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1 import transforms
+
+
+class StorageBackend:
+    """Document store interface used by LocalClient.
+
+    Documents are plain dicts keyed by their full path, e.g.
+    ``users/42`` or ``users/42/history/recent``. LocalClient serializes
+    access, so implementations do not need their own locking.
+    """
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Return the document at path, or None if it does not exist."""
+        raise NotImplementedError
+
+    def put(self, path: str, data: Dict) -> None:
+        """Create or replace the document at path."""
+        raise NotImplementedError
+
+    def delete(self, path: str) -> None:
+        """Delete the document at path if it exists."""
+        raise NotImplementedError
+
+    def list(self, collection_path: str) -> List[Tuple[str, Dict]]:
+        """Return (path, data) for every document directly in a collection."""
+        raise NotImplementedError
+
+
+class MemoryBackend(StorageBackend):
+    """Keep documents in a dict; everything is lost when the process exits."""
+
+    def __init__(self):
+        self._documents: Dict[str, Dict] = {}
+
+    def get(self, path: str) -> Optional[Dict]:
+        return copy.deepcopy(self._documents.get(path))
+
+    def put(self, path: str, data: Dict) -> None:
+        self._documents[path] = copy.deepcopy(data)
+
+    def delete(self, path: str) -> None:
+        self._documents.pop(path, None)
+
+    def list(self, collection_path: str) -> List[Tuple[str, Dict]]:
+        return [
+            (path, copy.deepcopy(data))
+            for path, data in self._documents.items()
+            if _parent_path(path) == collection_path
+        ]
+
+
+class SQLiteBackend(StorageBackend):
+    """Keep documents as JSON rows in a SQLite database file."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "path TEXT PRIMARY KEY, collection TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_collection ON documents (collection)"
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT data FROM documents WHERE path = ?", (path,)
+        ).fetchone()
+        return _loads(row[0]) if row else None
+
+    def put(self, path: str, data: Dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (path, collection, data) VALUES (?, ?, ?)",
+            (path, _parent_path(path), _dumps(data)),
+        )
+        self._conn.commit()
+
+    def delete(self, path: str) -> None:
+        self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+        self._conn.commit()
+
+    def list(self, collection_path: str) -> List[Tuple[str, Dict]]:
+        rows = self._conn.execute(
+            "SELECT path, data FROM documents WHERE collection = ?", (collection_path,)
+        ).fetchall()
+        return [(path, _loads(data)) for path, data in rows]
+
+
+def _dumps(data: Dict) -> str:
+    """Serialize a document, tagging datetimes so they round-trip."""
+
+    def default(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        raise TypeError(f"Cannot store {type(value).__name__} in a document")
+
+    return json.dumps(data, default=default)
+
+
+def _loads(raw: str) -> Dict:
+    def object_hook(value):
+        if set(value) == {"__datetime__"}:
+            return datetime.fromisoformat(value["__datetime__"])
+        return value
+
+    return json.loads(raw, object_hook=object_hook)
+
+
+def _parent_path(path: str) -> str:
+    return path.rsplit("/", 1)[0]
+
+
+def _split_field_path(field_path: str) -> List[str]:
+    return [part.strip("`") for part in field_path.split(".")]
+
+
+def _get_field(data: Dict, parts: List[str]) -> Tuple[bool, Any]:
+    """Return (found, value) for a field path inside a document."""
+    node: Any = data
+    for part in parts:
+        if not isinstance(node, dict) or part not in node:
+            return False, None
+        node = node[part]
+    return True, node
+
+
+def _apply_value(current: Any, value: Any) -> Any:
+    """Resolve a written value against the current field value.
+
+    Returns DELETE_FIELD when the field should be removed.
+    """
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if value is transforms.DELETE_FIELD:
+        return transforms.DELETE_FIELD
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) else 0
+        return base + value.value
+    if isinstance(value, transforms.ArrayUnion):
+        base = list(current) if isinstance(current, list) else []
+        return base + [item for item in value.values if item not in base]
+    if isinstance(value, transforms.ArrayRemove):
+        base = list(current) if isinstance(current, list) else []
+        return [item for item in base if item not in value.values]
+    if isinstance(value, dict):
+        # A map value replaces the field, but may itself contain transforms
+        return _merge({}, value)
+    return copy.deepcopy(value)
+
+
+def _merge(target: Dict, data: Dict) -> Dict:
+    """Deep-merge data into target the way set(merge=True) does."""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            child = target.get(key)
+            target[key] = _merge(child if isinstance(child, dict) else {}, value)
+            continue
+        resolved = _apply_value(target.get(key), value)
+        if resolved is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        else:
+            target[key] = resolved
+    return target
+
+
+def _update(document: Dict, fields: Dict) -> Dict:
+    """Apply an update() call (keys are dotted field paths) to a document."""
+    for field_path, value in fields.items():
+        *parents, leaf = _split_field_path(field_path)
+        node = document
+        for part in parents:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        resolved = _apply_value(node.get(leaf), value)
+        if resolved is transforms.DELETE_FIELD:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = resolved
+    return document
+
+
+def project_fields(data: Dict, field_paths: List[str]) -> Dict:
+    """Keep only the given field paths of a document."""
+    projected: Dict = {}
+    for field_path in field_paths:
+        parts = _split_field_path(field_path)
+        found, value = _get_field(data, parts)
+        if not found:
+            continue
+        node = projected
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return projected
+
+
+class LocalSnapshot:
+    """Result of reading a document, like firestore.DocumentSnapshot."""
+
+    def __init__(self, reference, data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        found, value = _get_field(self._data or {}, _split_field_path(field_path))
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda field, values: field in values,
+    "not-in": lambda field, values: field not in values,
+    "array-contains": lambda field, value: isinstance(field, list) and value in field,
+    "array-contains-any": lambda field, values: isinstance(field, list)
+    and any(value in field for value in values),
+}
+
+
+class LocalQuery:
+    """Filtered, ordered view of a collection, like firestore.Query."""
+
+    ASCENDING = firestore.Query.ASCENDING
+    DESCENDING = firestore.Query.DESCENDING
+
+    def __init__(
+        self,
+        client: "LocalClient",
+        path: str,
+        filters: Tuple = (),
+        orders: Tuple = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+        field_paths: Optional[List[str]] = None,
+    ):
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._offset = offset
+        self._field_paths = field_paths
+
+    def _copy(self, **changes) -> "LocalQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "offset": self._offset,
+            "field_paths": self._field_paths,
+            **changes,
+        }
+        return LocalQuery(self._client, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported query operator: {op_string}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def offset(self, count: int):
+        return self._copy(offset=count)
+
+    def select(self, field_paths: List[str]):
+        return self._copy(field_paths=list(field_paths))
+
+    def stream(self, transaction=None) -> Iterator[LocalSnapshot]:
+        with self._client._lock:
+            documents = self._client._backend.list(self._path)
+
+        matches = []
+        for path, data in documents:
+            if all(self._matches(data, *condition) for condition in self._filters):
+                # Firestore skips documents that lack an ordered field
+                if all(
+                    _get_field(data, _split_field_path(field))[0]
+                    for field, _ in self._orders
+                ):
+                    matches.append((path, data))
+
+        for field, direction in reversed(self._orders):
+            parts = _split_field_path(field)
+            matches.sort(
+                key=lambda match: _get_field(match[1], parts)[1],
+                reverse=direction == self.DESCENDING,
+            )
+        if not self._orders:
+            matches.sort(key=lambda match: match[0])
+
+        end = None if self._limit is None else self._offset + self._limit
+        for path, data in matches[self._offset : end]:
+            if self._field_paths is not None:
+                data = project_fields(data, self._field_paths)
+            yield LocalSnapshot(self._client._document(path), data)
+
+    def get(self, transaction=None) -> List[LocalSnapshot]:
+        return list(self.stream())
+
+    @staticmethod
+    def _matches(data: Dict, field_path: str, op_string: str, value: Any) -> bool:
+        found, field = _get_field(data, _split_field_path(field_path))
+        if not found:
+            return False
+        try:
+            return _OPERATORS[op_string](field, value)
+        except TypeError:
+            return False
+
+
+class LocalCollectionReference(LocalQuery):
+    """A collection of documents, like firestore.CollectionReference."""
+
+    def __init__(self, client: "LocalClient", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> "LocalDocumentReference":
+        if document_id is None:
+            document_id = uuid.uuid4().hex[:20]
+        return self._client._document(f"{self._path}/{document_id}")
+
+    def add(self, data: Dict) -> Tuple[datetime, "LocalDocumentReference"]:
+        reference = self.document()
+        reference.set(data)
+        return datetime.now(timezone.utc), reference
+
+
+class LocalDocumentReference:
+    """A single document, like firestore.DocumentReference."""
+
+    def __init__(self, client: "LocalClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, collection_id: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths: Optional[List[str]] = None, transaction=None) -> LocalSnapshot:
+        with self._client._lock:
+            data = self._client._backend.get(self.path)
+        if isinstance(transaction, LocalTransaction):
+            transaction._record_read(self.path, data)
+        if data is not None and field_paths is not None:
+            data = project_fields(data, field_paths)
+        return LocalSnapshot(self, data)
+
+    def set(self, document_data: Dict, merge: bool = False) -> None:
+        with self._client._lock:
+            self._client._set(self.path, document_data, merge)
+
+    def update(self, field_updates: Dict) -> None:
+        with self._client._lock:
+            self._client._update(self.path, field_updates)
+
+    def delete(self) -> None:
+        with self._client._lock:
+            self._client._backend.delete(self.path)
+
+
+class LocalWriteBatch:
+    """Writes applied together on commit, like firestore.WriteBatch."""
+
+    def __init__(self, client: "LocalClient"):
+        self._client = client
+        self._writes: List[Tuple[str, str, Any, bool]] = []
+
+    def set(self, reference, document_data: Dict, merge: bool = False) -> None:
+        self._writes.append(("set", reference.path, document_data, merge))
+
+    def update(self, reference, field_updates: Dict) -> None:
+        self._writes.append(("update", reference.path, field_updates, False))
+
+    def delete(self, reference) -> None:
+        self._writes.append(("delete", reference.path, None, False))
+
+    def commit(self) -> List:
+        """Apply every write, or none of them if one fails."""
+        with self._client._lock:
+            backend = self._client._backend
+            originals = {path: backend.get(path) for _, path, _, _ in self._writes}
+            try:
+                for kind, path, data, merge in self._writes:
+                    if kind == "set":
+                        self._client._set(path, data, merge)
+                    elif kind == "update":
+                        self._client._update(path, data)
+                    else:
+                        backend.delete(path)
+            except Exception:
+                for path, original in originals.items():
+                    if original is None:
+                        backend.delete(path)
+                    else:
+                        backend.put(path, original)
+                raise
+            finally:
+                self._writes = []
+        return []
+
+
+class LocalTransaction(LocalWriteBatch):
+    """Transaction for LocalClient.
+
+    run() calls the transactional function while holding the client's lock,
+    so its reads and the commit of its writes are serialized with every
+    other operation and never need a retry.
+
+    run_async() can't hold that thread lock across awaits: coroutines on the
+    loop thread would re-enter it, and a thread waiting for it would block
+    the loop. Like Firestore, it reads without locking instead and, under
+    the lock at commit, checks that every document it read is unchanged,
+    running the function again after a backoff if not.
+    """
+
+    # Attempts before run_async gives up, and the first backoff before a
+    # retry (doubled after each one, with jitter), as in Firestore
+    MAX_ATTEMPTS = 5
+    RETRY_BACKOFF_SECONDS = 0.01
+
+    def __init__(self, client: "LocalClient"):
+        super().__init__(client)
+        self._reads: Dict[str, Optional[Dict]] = {}
+
+    def _record_read(self, path: str, data: Optional[Dict]) -> None:
+        self._reads.setdefault(path, data)
+
+    def run(self, to_wrap: Callable, *args, **kwargs):
+        with self._client._lock:
+            self._reads = {}
+            result = to_wrap(self, *args, **kwargs)
+            self.commit()
+            return result
+
+    async def run_async(self, to_wrap: Callable, *args, **kwargs):
+        for attempt in range(self.MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(
+                    random.uniform(0, self.RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                )
+            self._writes = []
+            self._reads = {}
+            result = await to_wrap(self, *args, **kwargs)
+            with self._client._lock:
+                backend = self._client._backend
+                if all(backend.get(path) == data for path, data in self._reads.items()):
+                    self.commit()
+                    return result
+        self._writes = []
+        raise Aborted(f"Transaction contended {self.MAX_ATTEMPTS} times, giving up")
+
+
+class LocalClient:
+    """Firestore-compatible client over a StorageBackend.
+
+    Args:
+        backend: Where documents are stored
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self._backend = backend
+        self._lock = threading.RLock()
+
+    def collection(self, collection_id: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, collection_id)
+
+    def document(self, document_path: str) -> LocalDocumentReference:
+        return self._document(document_path)
+
+    def batch(self) -> LocalWriteBatch:
+        return LocalWriteBatch(self)
+
+    def transaction(self) -> LocalTransaction:
+        return LocalTransaction(self)
+
+    def _document(self, path: str) -> LocalDocumentReference:
+        return LocalDocumentReference(self, path)
+
+    def _set(self, path: str, data: Dict, merge: bool) -> None:
+        current = self._backend.get(path) if merge else None
+        self._backend.put(path, _merge(current or {}, data))
+
+    def _update(self, path: str, fields: Dict) -> None:
+        current = self._backend.get(path)
+        if current is None:
+            raise NotFound(f"No document to update: {path}")
+        self._backend.put(path, _update(current, fields))
+
+
+class AsyncLocalDocumentReference:
+    """Awaitable wrapper of LocalDocumentReference, like AsyncDocumentReference."""
+
+    def __init__(self, reference: LocalDocumentReference):
+        self.sync = reference
+        self.path = reference.path
+        self.id = reference.id
+
+    def collection(self, collection_id: str) -> "AsyncLocalQuery":
+        return AsyncLocalQuery(self.sync.collection(collection_id))
+
+    async def get(self, field_paths: Optional[List[str]] = None, transaction=None):
+        snapshot = self.sync.get(field_paths=field_paths, transaction=transaction)
+        return LocalSnapshot(self, snapshot._data)
+
+    async def set(self, document_data: Dict, merge: bool = False) -> None:
+        self.sync.set(document_data, merge=merge)
+
+    async def update(self, field_updates: Dict) -> None:
+        self.sync.update(field_updates)
+
+    async def delete(self) -> None:
+        self.sync.delete()
+
+
+class AsyncLocalQuery:
+    """Awaitable wrapper of LocalQuery and LocalCollectionReference."""
+
+    def __init__(self, query: LocalQuery):
+        self.sync = query
+
+    def document(self, document_id: Optional[str] = None):
+        return AsyncLocalDocumentReference(self.sync.document(document_id))
+
+    def where(self, *args, **kwargs):
+        return AsyncLocalQuery(self.sync.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs):
+        return AsyncLocalQuery(self.sync.order_by(*args, **kwargs))
+
+    def limit(self, count: int):
+        return AsyncLocalQuery(self.sync.limit(count))
+
+    def offset(self, count: int):
+        return AsyncLocalQuery(self.sync.offset(count))
+
+    def select(self, field_paths: List[str]):
+        return AsyncLocalQuery(self.sync.select(field_paths))
+
+    async def stream(self, transaction=None):
+        for snapshot in self.sync.stream():
+            yield LocalSnapshot(
+                AsyncLocalDocumentReference(snapshot.reference), snapshot._data
+            )
+
+    async def get(self, transaction=None) -> List[LocalSnapshot]:
+        return [snapshot async for snapshot in self.stream()]
+
+
+class AsyncLocalWriteBatch:
+    """Awaitable wrapper of LocalWriteBatch."""
+
+    def __init__(self, batch: LocalWriteBatch):
+        self.sync = batch
+
+    def set(self, reference, document_data: Dict, merge: bool = False) -> None:
+        self.sync.set(reference, document_data, merge=merge)
+
+    def update(self, reference, field_updates: Dict) -> None:
+        self.sync.update(reference, field_updates)
+
+    def delete(self, reference) -> None:
+        self.sync.delete(reference)
+
+    async def commit(self) -> List:
+        return self.sync.commit()
+
+
+class AsyncLocalClient:
+    """Firestore AsyncClient-compatible view of a LocalClient."""
+
+    def __init__(self, client: LocalClient):
+        self.sync = client
+
+    def collection(self, collection_id: str) -> AsyncLocalQuery:
+        return AsyncLocalQuery(self.sync.collection(collection_id))
+
+    def document(self, document_path: str) -> AsyncLocalDocumentReference:
+        return AsyncLocalDocumentReference(self.sync.document(document_path))
+
+    def batch(self) -> AsyncLocalWriteBatch:
+        return AsyncLocalWriteBatch(self.sync.batch())
+
+    def transaction(self) -> LocalTransaction:
+        return self.sync.transaction()
+
+
+def transactional(to_wrap: Callable) -> Callable:
+    """Like firestore.transactional, but also runs on LocalClient."""
+
+    @functools.wraps(to_wrap)
+    def run(transaction, *args, **kwargs):
+        if isinstance(transaction, LocalTransaction):
+            return transaction.run(to_wrap, *args, **kwargs)
+        return firestore.transactional(to_wrap)(transaction, *args, **kwargs)
+
+    return run
+
+
+def async_transactional(to_wrap: Callable) -> Callable:
+    """Like firestore.async_transactional, but also runs on LocalClient."""
+
+    @functools.wraps(to_wrap)
+    async def run(transaction, *args, **kwargs):
+        if isinstance(transaction, LocalTransaction):
+            return await transaction.run_async(to_wrap, *args, **kwargs)
+        return await firestore.async_transactional(to_wrap)(
+            transaction, *args, **kwargs
+        )
+
+    return run
+
+
+def create_local_client(config: Dict) -> LocalClient:
+    """Create the local client selected by config["backend"] ("memory" or "sqlite")."""
+    if config["backend"] == "memory":
+        return LocalClient(MemoryBackend())
+    if config["backend"] == "sqlite":
+        return LocalClient(SQLiteBackend(config["sqlite_path"]))
+    raise ValueError(f"Unknown database backend: {config['backend']}")
@@ -0,0 +1,195 @@
+"""Write-behind buffer for per-user stats counters.
+
+Stats increments (summaries per month, processing time, ...) are accumulated
+in memory per user and field, then written as firestore.Increment transforms
+in WriteBatches, one write per user, on a timer or once enough users are
+pending. Increments that fail to commit are merged back and retried with the
+next flush, and stop() (plus an atexit hook) flushes whatever is left.
+
+Only stats belong here: the counters the limit checks read (LIMIT_COUNTERS)
+are incremented at once, or a user could go past their limit before a flush.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+
+from src.config import WRITE_BUFFER_CONFIG
+from src.database.db_manager import db_manager
+
+logger = logging.getLogger(__name__)
+
+# Firestore limit on writes per batch
+MAX_BATCH_WRITES = 500
+
+
+class StatsWriteBuffer:
+    """Coalesce counter increments per user and flush them in batches.
+
+    Args:
+        config: Buffer settings, see WRITE_BUFFER_CONFIG
+    """
+
+    def __init__(self, config: Dict = WRITE_BUFFER_CONFIG):
+        self.enabled = config["enabled"]
+        self.flush_interval = config["flush_interval_seconds"]
+        self.max_pending_users = config["max_pending_users"]
+        self.db = db_manager
+        self.metrics = db_manager.metrics
+
+        self._pending: Dict[int, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        atexit.register(self.flush)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def increment(self, user_id: int, fields: Dict[str, float]) -> None:
+        """Add increments for a user's fields, keyed by dotted field path.
+
+        Without a running flush loop the increments are written immediately:
+        in a worker thread when called on an event loop, so the loop never
+        waits on Firestore, and inline otherwise (e.g. in scripts).
+        """
+        with self._lock:
+            pending = self._pending[user_id]
+            for field, amount in fields.items():
+                pending[field] += amount
+            pending_users = len(self._pending)
+
+        if not self.enabled or not self.running:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+            else:
+                loop.run_in_executor(None, self.flush)
+        elif pending_users >= self.max_pending_users:
+            self._loop.call_soon_threadsafe(self._flush_requested.set)
+
+    def flush(self) -> int:
+        """Write all pending increments. Returns the number of users written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(
+                    lambda: defaultdict(int)
+                )
+            if not pending:
+                return 0
+
+            start_time = time.perf_counter()
+            users = list(pending.items())
+            # Users written, or dropped because they have no document
+            done = 0
+            success = True
+            try:
+                for start in range(0, len(users), MAX_BATCH_WRITES):
+                    chunk = users[start : start + MAX_BATCH_WRITES]
+                    batch = self.db.db.batch()
+                    for user_id, fields in chunk:
+                        batch.update(
+                            self.db._get_user_doc(user_id), self._increments(fields)
+                        )
+                    try:
+                        batch.commit()
+                    except NotFound:
+                        # One user without a document fails the whole batch:
+                        # write the chunk user by user and skip unknown users
+                        for user_id, fields in chunk:
+                            try:
+                                self.db._get_user_doc(user_id).update(
+                                    self._increments(fields)
+                                )
+                            except NotFound:
+                                logger.warning(
+                                    f"Dropping buffered stats of unknown user {user_id}"
+                                )
+                            self.db._invalidate_user(user_id)
+                            done += 1
+                        continue
+                    for user_id, _ in chunk:
+                        self.db._invalidate_user(user_id)
+                    done += len(chunk)
+            except Exception as e:
+                logger.error(f"Error flushing buffered stats: {e}")
+                self._requeue(dict(users[done:]))
+                success = False
+
+            self.metrics.log_db_operation(
+                "StatsWriteBuffer.flush",
+                "batch_write",
+                "users",
+                time.perf_counter() - start_time,
+                doc_count=done,
+                success=success,
+            )
+            return done
+
+    def _requeue(self, failed: Dict[int, Dict[str, float]]) -> None:
+        """Merge increments from a failed flush back into the buffer."""
+        with self._lock:
+            for user_id, fields in failed.items():
+                pending = self._pending[user_id]
+                for field, amount in fields.items():
+                    pending[field] += amount
+
+    @staticmethod
+    def _increments(fields: Dict[str, float]) -> Dict:
+        """Increment transforms for update(), keyed by dotted field path.
+
+        update() (unlike set(merge=True)) never creates a document, so
+        buffered stats cannot leave stub documents for unknown users.
+        """
+        return {path: firestore.Increment(amount) for path, amount in fields.items()}
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop."""
+        if not self.enabled or self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._flush_requested = asyncio.Event()
+        self._task = self._loop.create_task(self._flush_loop())
+        logger.info("Stats write buffer started")
+
+    async def stop(self) -> None:
+        """Stop the flush task and write everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+        logger.info("Stats write buffer flushed and stopped")
+
+    async def _flush_loop(self) -> None:
+        """Flush on every interval, or earlier when the buffer fills up."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await loop.run_in_executor(None, self.flush)
+
+
+# Create a singleton instance
+stats_buffer = StatsWriteBuffer()
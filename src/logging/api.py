@@ -68,6 +68,26 @@ async def get_api_metrics(
     
     return stats
 
+@metrics_router.get("/cache")
+async def get_cache_metrics() -> Dict:
+    """Get hit/miss statistics for the in-process caches"""
+    return MetricsCollector().get_cache_stats()
+
+@metrics_router.get("/models")
+async def get_model_metrics() -> Dict:
+    """Get load time and memory footprint of lazily loaded models"""
+    return MetricsCollector().get_model_stats()
+
+@metrics_router.get("/database")
+async def get_database_metrics() -> Dict:
+    """Get call counts and p50/p95/p99 latency per database method"""
+    return MetricsCollector().get_db_operation_stats()
+
+@metrics_router.get("/queue")
+async def get_queue_metrics() -> Dict:
+    """Get depth, job counts and wait/service time percentiles per job queue"""
+    return MetricsCollector().get_queue_stats()
+
 @metrics_router.get("/logs")
 async def get_recent_logs(
     limit: int = Query(100, description="Number of log entries to return"),
@@ -0,0 +1,76 @@
+"""Fixed-size latency histogram with log-spaced buckets."""
+
+import math
+import threading
+from typing import Dict, List
+
+
+class LatencyHistogram:
+    """Record latencies in O(1) and estimate percentiles from bucket counts.
+
+    Buckets grow geometrically by growth_factor from min_seconds up to
+    max_seconds, so percentile estimates are within about half a bucket
+    (±5% with the default factor) at any scale, and memory stays fixed no
+    matter how many values are recorded.
+    """
+
+    def __init__(
+        self,
+        min_seconds: float = 1e-5,
+        max_seconds: float = 120.0,
+        growth_factor: float = 1.1,
+    ):
+        self.min_seconds = min_seconds
+        self._log_growth = math.log(growth_factor)
+        self._growth_factor = growth_factor
+        size = int(math.ceil(math.log(max_seconds / min_seconds) / self._log_growth)) + 2
+        self._counts: List[int] = [0] * size
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one latency measurement."""
+        if seconds <= self.min_seconds:
+            index = 0
+        else:
+            index = min(
+                int(math.log(seconds / self.min_seconds) / self._log_growth) + 1,
+                len(self._counts) - 1,
+            )
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) in seconds."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(self.count * q / 100))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    break
+
+        if index == 0:
+            return self.min_seconds
+        # Geometric midpoint of the bucket, capped by the largest value seen
+        lower = self.min_seconds * self._growth_factor ** (index - 1)
+        return min(lower * math.sqrt(self._growth_factor), self.max)
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, max and p50/p95/p99, in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
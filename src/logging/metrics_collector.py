@@ -4,9 +4,12 @@ from google.cloud import monitoring_v3
 from google.api import metric_pb2
 from src.config import GCP_PROJECT_ID
 import logging
+import time
 import numpy as np
 import logging 
 
+from .histogram import LatencyHistogram
+
 class MetricsCollector:
     instance = None
 
@@ -17,19 +20,32 @@ class MetricsCollector:
 
     def __init__(self):
         """Initialize metrics collector."""
+        if hasattr(self, "initialized"):
+            return
         self.user_conversions = []
         self.firestore_metrics = []
         self.cloud_run_metrics = []
         self.tts_metrics = []
         self.processing_metrics = []
+        self.cache_metrics = {}
+        self.model_metrics = {}
+        self.db_operations = {}
+        self.queue_metrics = {}
         self.logger = logging.getLogger("MetricsCollector")
 
-        # Initialize Cloud Monitoring client
-        self.client = monitoring_v3.MetricServiceClient()
+        # Initialize Cloud Monitoring client; without GCP credentials (e.g.
+        # with a local database backend) metrics are only kept in memory
+        try:
+            self.client = monitoring_v3.MetricServiceClient()
+        except Exception as e:
+            self.logger.warning(f"Cloud Monitoring disabled: {str(e)}")
+            self.client = None
         self.project_path = f"projects/{GCP_PROJECT_ID}"
 
         # Create custom metric descriptors if they don't exist
-        self._create_metric_descriptors()
+        if self.client is not None:
+            self._create_metric_descriptors()
+        self.initialized = True
 
     def _create_metric_descriptors(self):
         """Create custom metric descriptors in Cloud Monitoring."""
@@ -120,6 +136,8 @@ class MetricsCollector:
         self, metric_type: str, value: float, labels: Dict[str, str] = None
     ):
         """Log a metric to Cloud Monitoring."""
+        if self.client is None:
+            return
         try:
             # Create the time series
             series = monitoring_v3.TimeSeries()
@@ -331,7 +349,8 @@ class MetricsCollector:
             # Don't raise the error since this is non-critical functionality
 
     def log_summary_generation(
-        self, user_id: int, char_count: int, success: bool, summary_type: str, processing_time: float, error: str = None
+        self, user_id: int, char_count: int, success: bool, summary_type: str, processing_time: float, error: str = None,
+        stage_timings: Optional[Dict[str, float]] = None,
     ):
         """Log summary generation metrics.
 
@@ -342,6 +361,8 @@ class MetricsCollector:
             summary_type: Type of summary (gemini, bert)
             processing_time: Time taken to generate the summary
             error: Optional error message
+            stage_timings: Optional duration in seconds of each pipeline stage
+                (e.g. split, map, reduce for chunked summaries)
         """
         metric = {
             "timestamp": datetime.now().isoformat(),
@@ -353,6 +374,9 @@ class MetricsCollector:
             "error": error,
         }
 
+        if stage_timings:
+            metric["stage_timings"] = stage_timings
+
         self.processing_metrics.append(metric)
 
         # Log to Cloud Monitoring
@@ -367,6 +391,161 @@ class MetricsCollector:
             },
         )
 
+    def log_cache_access(self, cache_name: str, hit: bool, count: int = 1) -> None:
+        """Count cache lookups as hits or misses.
+
+        Args:
+            cache_name: Name of the cache (e.g. summary, transcript)
+            hit: Whether the lookups were served from the cache
+            count: Number of lookups to record
+        """
+        counters = self.cache_metrics.setdefault(cache_name, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += count
+
+    def get_cache_stats(self) -> Dict:
+        """Get hit/miss counts and hit rate for every cache."""
+        stats = {}
+        for cache_name, counters in self.cache_metrics.items():
+            total = counters["hits"] + counters["misses"]
+            stats[cache_name] = {
+                "hits": counters["hits"],
+                "misses": counters["misses"],
+                "hit_rate": counters["hits"] / total if total else 0.0,
+            }
+        return stats
+
+    def log_model_load(self, model_name: str, load_time: float, memory_mb: float) -> None:
+        """Log how long a model took to load and how much memory it added.
+
+        Args:
+            model_name: Name of the loaded model
+            load_time: Load time in seconds
+            memory_mb: Increase in process RSS caused by the load, in MB
+        """
+        self.model_metrics[model_name] = {
+            "timestamp": datetime.now().isoformat(),
+            "load_time": load_time,
+            "memory_mb": memory_mb,
+        }
+        self.logger.info(
+            f"Loaded {model_name} in {load_time:.2f}s (+{memory_mb:.0f} MB RSS)"
+        )
+
+    def get_model_stats(self) -> Dict:
+        """Get load time and memory footprint of every loaded model."""
+        return dict(self.model_metrics)
+
+    def log_db_operation(
+        self,
+        method: str,
+        operation_type: str,
+        collection: str,
+        latency: float,
+        doc_count: int = 1,
+        success: bool = True,
+    ) -> None:
+        """Record one database call in the method's latency histogram.
+
+        Kept in process only (no Cloud Monitoring call), so it is cheap
+        enough to run on every database call.
+
+        Args:
+            method: Database method name (e.g. get_user_data)
+            operation_type: read, write, query or batch_write
+            collection: Collection the method works on
+            latency: Call duration in seconds
+            doc_count: Number of documents read or written
+            success: Whether the call completed without raising
+        """
+        operation = self.db_operations.get(method)
+        if operation is None:
+            operation = self.db_operations.setdefault(
+                method,
+                {
+                    "operation_type": operation_type,
+                    "collection": collection,
+                    "errors": 0,
+                    "documents": 0,
+                    "latency": LatencyHistogram(),
+                },
+            )
+        operation["latency"].record(latency)
+        operation["documents"] += doc_count
+        if not success:
+            operation["errors"] += 1
+
+    def get_db_operation_stats(self) -> Dict:
+        """Get call counts and p50/p95/p99 latency per database method."""
+        stats = {}
+        for method, operation in self.db_operations.items():
+            stats[method] = {
+                "operation_type": operation["operation_type"],
+                "collection": operation["collection"],
+                "errors": operation["errors"],
+                "documents": operation["documents"],
+                **operation["latency"].summary(),
+            }
+        return stats
+
+    def _queue(self, queue_name: str) -> Dict:
+        """Get (creating it on first use) the metrics entry of a job queue."""
+        queue = self.queue_metrics.get(queue_name)
+        if queue is None:
+            queue = self.queue_metrics.setdefault(
+                queue_name,
+                {
+                    "completed": 0,
+                    "errors": 0,
+                    "rejected": 0,
+                    "depth": 0,
+                    "peak_depth": 0,
+                    "wait": LatencyHistogram(),
+                    "service": LatencyHistogram(),
+                },
+            )
+        return queue
+
+    def log_queue_depth(self, queue_name: str, depth: int) -> None:
+        """Record the number of jobs waiting in a queue."""
+        queue = self._queue(queue_name)
+        queue["depth"] = depth
+        queue["peak_depth"] = max(queue["peak_depth"], depth)
+
+    def log_queue_rejected(self, queue_name: str) -> None:
+        """Count a job turned away because the queue was full."""
+        self._queue(queue_name)["rejected"] += 1
+
+    def log_queue_job(
+        self, queue_name: str, wait_time: float, service_time: float, success: bool
+    ) -> None:
+        """Record how long a job waited for a worker and how long it ran.
+
+        Args:
+            queue_name: Name of the queue (e.g. summary)
+            wait_time: Seconds between enqueueing and a worker picking it up
+            service_time: Seconds the worker spent running it
+            success: Whether the job completed without raising
+        """
+        queue = self._queue(queue_name)
+        queue["wait"].record(wait_time)
+        queue["service"].record(service_time)
+        queue["completed" if success else "errors"] += 1
+
+    def get_queue_stats(self) -> Dict:
+        """Get depth, job counts and wait/service time percentiles per queue."""
+        stats = {}
+        for queue_name, queue in self.queue_metrics.items():
+            stats[queue_name] = {
+                "depth": queue["depth"],
+                "peak_depth": queue["peak_depth"],
+                "completed": queue["completed"],
+                "errors": queue["errors"],
+                "rejected": queue["rejected"],
+                "wait": queue["wait"].summary(),
+                "service": queue["service"].summary(),
+            }
+        return stats
+
     def get_api_stats(self) -> Dict:
         """Get comprehensive API and usage statistics"""
         if not any(
@@ -5,12 +5,20 @@ import os
 import hmac
 import hashlib
 from src.services import payment_processor
-from src.config import NOWPAYMENTS_CONFIG, TOKEN
+from src.config import (
+    NOWPAYMENTS_CONFIG,
+    TELEGRAM_IPS,
+    TOKEN,
+    WEBHOOK_CONFIG,
+    WEBHOOK_RATE_LIMIT,
+    logger,
+)
 from src.logging import metrics_router
 from src.logging.api import track_cloud_run_metrics_middleware
 from src.bot.bot import application
 from telegram import Update
-from src.core.utils.security import security_check
+from src.core.utils.security import is_valid_ip
+from src.core.utils.shared_state import shared_state
 
 webhook_app = FastAPI()
 security = HTTPBasic()
@@ -26,26 +34,15 @@ webhook_app.add_middleware(
 # Add metrics middleware
 webhook_app.middleware("http")(track_cloud_run_metrics_middleware)
 
-# Rate limiting storage
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-webhook_requests = defaultdict(list)
-WEBHOOK_RATE_LIMIT = 100  # requests per minute
+# Rate limiting
 WEBHOOK_WINDOW = 60  # seconds
 
 
-def check_webhook_rate_limit(ip: str) -> bool:
-    current_time = datetime.now()
-    webhook_requests[ip] = [
-        req_time
-        for req_time in webhook_requests[ip]
-        if current_time - req_time < timedelta(seconds=WEBHOOK_WINDOW)
-    ]
-    if len(webhook_requests[ip]) >= WEBHOOK_RATE_LIMIT:
-        return False
-    webhook_requests[ip].append(current_time)
-    return True
+async def check_webhook_rate_limit(ip: str) -> bool:
+    """Allow WEBHOOK_RATE_LIMIT requests per IP and window across all workers."""
+    return (
+        await shared_state.incr(f"webhook:{ip}", WEBHOOK_WINDOW) <= WEBHOOK_RATE_LIMIT
+    )
 
 
 def verify_admin(credentials: HTTPBasicCredentials = Depends(security)):
@@ -73,33 +70,41 @@ webhook_app.include_router(metrics_router, dependencies=[Depends(verify_admin)])
 
 @webhook_app.post(f"/telegram-webhook/{TOKEN}")
 async def telegram_webhook(request: Request):
-    """Handle Telegram webhook updates with security checks."""
+    """Accept a Telegram update and hand it to the bot application.
+
+    The update is put on application.update_queue, which the running
+    Application consumes on this same event loop, and Telegram gets its
+    200 right away; handlers (and the summary queue behind them) run
+    after the response. Content checks happen in the handlers, which can
+    reply to the user, so only the sender is verified here.
+    """
     try:
         # Rate limiting check
         client_ip = request.client.host
-        if not check_webhook_rate_limit(client_ip):
+        if not await check_webhook_rate_limit(client_ip):
             raise HTTPException(status_code=429, detail="Too many requests")
 
-        # Verify Telegram IP (optional but recommended)
-        telegram_ips = [
-            "149.154.160.0/20",
-            "91.108.4.0/22",
-        ]
-        if not any(client_ip.startswith(ip.split("/")[0]) for ip in telegram_ips):
+        # With a secret token, Telegram proves itself on every delivery;
+        # otherwise fall back to checking its published IP ranges
+        secret_token = WEBHOOK_CONFIG["secret_token"]
+        if secret_token:
+            received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(received, secret_token):
+                logger.warning(f"Invalid webhook secret token from IP: {client_ip}")
+                raise HTTPException(status_code=403, detail="Forbidden")
+        elif not is_valid_ip(client_ip, TELEGRAM_IPS):
             logger.warning(f"Request from non-Telegram IP: {client_ip}")
             raise HTTPException(status_code=403, detail="Forbidden")
 
+        if not application.running:
+            raise HTTPException(status_code=503, detail="Bot is not running")
+
         data = await request.json()
         update = Update.de_json(data, application.bot)
-
-        # Perform security checks on the update
-        is_allowed, error_message = await security_check(update)
-        if not is_allowed:
-            logger.warning(f"Security check failed: {error_message}")
-            raise HTTPException(status_code=400, detail=error_message)
-
-        await application.process_update(update)
+        await application.update_queue.put(update)
         return Response(content="OK", status_code=200)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in telegram webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -111,7 +116,7 @@ async def stripe_webhook(request: Request):
     try:
         # Rate limiting check
         client_ip = request.client.host
-        if not check_webhook_rate_limit(client_ip):
+        if not await check_webhook_rate_limit(client_ip):
             raise HTTPException(status_code=429, detail="Too many requests")
 
         # Get the raw request body
@@ -150,7 +155,7 @@ async def nowpayments_webhook(request: Request):
     try:
         # Rate limiting check
         client_ip = request.client.host
-        if not check_webhook_rate_limit(client_ip):
+        if not await check_webhook_rate_limit(client_ip):
             raise HTTPException(status_code=429, detail="Too many requests")
 
         # Get the raw request body
@@ -4,6 +4,7 @@ from .monitoring import monitoring_service
 from .payments.payment_processor import payment_processor
 from .video_processor import VideoProcessor
 from .audio_processor import AudioProcessor
+from .summary_queue import SummaryJobQueue, summary_queue
 from .payments.stripe_service import StripeService
 from .payments.subscription_manager import SubscriptionManager
 from .payments.nowpayments_service import NOWPaymentsService
@@ -13,6 +14,8 @@ __all__ = [
     "payment_processor",
     "VideoProcessor",
     "AudioProcessor",
+    "SummaryJobQueue",
+    "summary_queue",
     "StripeService",
     "SubscriptionManager",
     "NOWPaymentsService",
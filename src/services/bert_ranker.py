@@ -0,0 +1,311 @@
+"""DistilBERT extractive sentence ranker used by the BERT summary path.
+
+Importing this module loads transformers (and torch or onnxruntime once an
+encoder is created), so it is only imported when the first BERT summary is
+requested (see VideoProcessor).
+"""
+
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+from transformers import DistilBertTokenizer
+
+from src.config import BERT_CONFIG
+from src.logging import metrics_collector
+from src.services.embedding_store import EmbeddingStore, sentence_key
+
+logger = logging.getLogger(__name__)
+
+
+class TorchEncoder:
+    """Run DistilBERT with PyTorch."""
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import DistilBertModel
+
+        self._torch = torch
+        self.model = DistilBertModel.from_pretrained(model_name)
+        self.model.eval()  # Set to evaluation mode
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Return the last hidden state for a padded batch."""
+        with self._torch.no_grad():
+            outputs = self.model(
+                input_ids=self._torch.from_numpy(input_ids),
+                attention_mask=self._torch.from_numpy(attention_mask),
+            )
+        return outputs.last_hidden_state.numpy()
+
+
+class OnnxEncoder:
+    """Run an int8 dynamically quantized DistilBERT export with ONNX Runtime.
+
+    The quantized model is exported on first use if it does not exist yet;
+    exporting needs torch, running it does not.
+    """
+
+    def __init__(self, model_name: str, model_path: str, num_threads: int = 0):
+        import onnxruntime
+
+        if not os.path.exists(model_path):
+            export_quantized_onnx(model_name, model_path)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.session = onnxruntime.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Return the last hidden state for a padded batch."""
+        return self.session.run(
+            ["last_hidden_state"],
+            {
+                "input_ids": input_ids.astype(np.int64),
+                "attention_mask": attention_mask.astype(np.int64),
+            },
+        )[0]
+
+
+def export_quantized_onnx(model_name: str, model_path: str) -> None:
+    """Export DistilBERT to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import DistilBertModel
+
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    float_path = f"{os.path.splitext(model_path)[0]}.fp32.onnx"
+
+    model = DistilBertModel.from_pretrained(model_name)
+    model.eval()
+    dummy = torch.ones((1, 8), dtype=torch.long)
+    torch.onnx.export(
+        model,
+        (dummy, dummy),
+        float_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+    )
+    quantize_dynamic(float_path, model_path, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+    logger.info(f"Exported quantized ONNX model to {model_path}")
+
+
+def create_encoder(config: Dict = BERT_CONFIG):
+    """Create the encoder selected by config["backend"] ("torch" or "onnx")."""
+    if config["backend"] == "onnx":
+        return OnnxEncoder(
+            config["model_name"], config["onnx_path"], config["onnx_threads"]
+        )
+    return TorchEncoder(config["model_name"])
+
+
+class BertRanker:
+    """Rank transcript sentences by similarity to the whole document."""
+
+    def __init__(self, config: Dict = BERT_CONFIG):
+        self.config = config
+        self.tokenizer = DistilBertTokenizer.from_pretrained(config["model_name"])
+        self.encoder = create_encoder(config)
+        self.metrics = metrics_collector
+
+        # Embeddings depend on the model, backend and sentence truncation
+        self.model_version = (
+            f"{config['model_name']}:{config['backend']}:{config['max_sentence_tokens']}"
+        )
+        self.embedding_store = None
+        if config["embedding_cache_enabled"]:
+            try:
+                self.embedding_store = EmbeddingStore(
+                    config["embedding_cache_path"], config["embedding_cache_capacity"]
+                )
+            except Exception as e:
+                logger.error(f"Error opening sentence embedding cache: {e}")
+
+    def select_key_sentences(self, content: str, max_sentences: int) -> List[str]:
+        """Pick the sentences closest to the document's topic centroids.
+
+        Runs synchronously; callers on the event loop should use a worker
+        thread.
+        """
+        sentences = [sentence for sentence in content.split(". ") if sentence.strip()]
+        if not sentences:
+            return []
+
+        # Embed the whole document and all sentences with DistilBERT
+        centroids = self._embed_document(content)
+        sentence_embeddings = self.embed_sentences(sentences)
+
+        # Cosine similarity of every sentence to every centroid in one product,
+        # scoring each sentence by its closest topic
+        sentence_unit = sentence_embeddings / np.maximum(
+            np.linalg.norm(sentence_embeddings, axis=1, keepdims=True), 1e-12
+        )
+        centroid_unit = centroids / np.maximum(
+            np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12
+        )
+        similarities = (sentence_unit @ centroid_unit.T).max(axis=1)
+
+        # Get top sentences based on user's preference
+        top_indices = np.argsort(similarities)[-max_sentences:]
+        return [sentences[i] for i in sorted(top_indices)]
+
+    def _embed_document(self, content: str) -> np.ndarray:
+        """Embed the full document as one or more topic centroids.
+
+        The document is tokenized once and encoded in overlapping windows
+        that fit the model's input size, so cost grows linearly with length
+        and late parts of long transcripts are represented as well as the
+        intro. Returns an array of shape (n_centroids, hidden_size).
+        """
+        window = self.config["window_tokens"]
+        stride = max(1, window - self.config["window_overlap_tokens"])
+        token_ids = self.tokenizer(
+            content, add_special_tokens=False, verbose=False
+        )["input_ids"]
+
+        windows = []
+        for start in range(0, max(len(token_ids), 1), stride):
+            windows.append(
+                [self.tokenizer.cls_token_id]
+                + token_ids[start : start + window]
+                + [self.tokenizer.sep_token_id]
+            )
+            if start + window >= len(token_ids):
+                break
+
+        batch_size = self.config["batch_size"]
+        window_embeddings = []
+        window_weights = []
+        for start in range(0, len(windows), batch_size):
+            inputs = self.tokenizer.pad(
+                {"input_ids": windows[start : start + batch_size]},
+                return_tensors="np",
+            )
+            window_embeddings.append(self._encode(inputs))
+            window_weights.append(inputs["attention_mask"].sum(axis=1))
+
+        embeddings = np.concatenate(window_embeddings)
+        weights = np.concatenate(window_weights).astype(np.float32)
+
+        n_centroids = min(self.config["document_centroids"], len(embeddings))
+        if n_centroids <= 1:
+            return np.average(embeddings, axis=0, weights=weights)[None, :]
+        return self._cluster_centroids(embeddings, n_centroids)
+
+    @staticmethod
+    def _cluster_centroids(
+        embeddings: np.ndarray, n_centroids: int, iterations: int = 10
+    ) -> np.ndarray:
+        """Group window embeddings into topic centroids with cosine k-means."""
+        unit = embeddings / np.maximum(
+            np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12
+        )
+        # Spread the initial centroids evenly through the document
+        seeds = np.linspace(0, len(unit) - 1, n_centroids).astype(int)
+        centroids = unit[seeds]
+        for _ in range(iterations):
+            assignments = (unit @ centroids.T).argmax(axis=1)
+            for k in range(n_centroids):
+                members = unit[assignments == k]
+                if len(members):
+                    centroids[k] = members.mean(axis=0)
+            centroids /= np.maximum(
+                np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12
+            )
+        return centroids
+
+    def embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """Embed sentences, reusing vectors from the embedding cache.
+
+        Only sentences missing from the cache go through the model; their
+        vectors are written back for later requests and other workers.
+        """
+        if self.embedding_store is None:
+            return self._encode_sentences(sentences)
+
+        try:
+            keys = [sentence_key(sentence, self.model_version) for sentence in sentences]
+            found, cached = self.embedding_store.get_many(keys)
+        except Exception as e:
+            logger.error(f"Error reading sentence embedding cache: {e}")
+            return self._encode_sentences(sentences)
+
+        hits = int(found.sum())
+        self.metrics.log_cache_access("sentence_embedding", hit=True, count=hits)
+        self.metrics.log_cache_access(
+            "sentence_embedding", hit=False, count=len(sentences) - hits
+        )
+        if hits == len(sentences):
+            return cached
+
+        # Encode each distinct missing sentence once
+        missing = {}
+        for index in np.flatnonzero(~found):
+            missing.setdefault(keys[index], sentences[index])
+        missing_keys = list(missing)
+        encoded = self._encode_sentences(list(missing.values()))
+
+        try:
+            self.embedding_store.put_many(missing_keys, encoded)
+        except Exception as e:
+            logger.error(f"Error writing sentence embedding cache: {e}")
+
+        rows = dict(zip(missing_keys, encoded))
+        embeddings = np.zeros((len(sentences), encoded.shape[1]), dtype=np.float32)
+        if hits:
+            embeddings[found] = cached
+        for index in np.flatnonzero(~found):
+            embeddings[index] = rows[keys[index]]
+        return embeddings
+
+    def _encode_sentences(self, sentences: List[str]) -> np.ndarray:
+        """Embed sentences with DistilBERT in padded mini-batches.
+
+        Sentences are sorted by length before batching so each batch pads to
+        a similar size; the returned rows follow the input order.
+        """
+        batch_size = self.config["batch_size"]
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+        embeddings = None
+
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start : start + batch_size]
+            inputs = self.tokenizer(
+                [sentences[i] for i in batch_indices],
+                return_tensors="np",
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_sentence_tokens"],
+            )
+            pooled = self._encode(inputs)
+            if embeddings is None:
+                embeddings = np.zeros((len(sentences), pooled.shape[1]), np.float32)
+            embeddings[batch_indices] = pooled
+
+        return embeddings
+
+    def _encode(self, inputs) -> np.ndarray:
+        """Run the encoder on a padded batch and mean-pool each row."""
+        hidden_states = self.encoder(inputs["input_ids"], inputs["attention_mask"])
+        return self._mean_pool(hidden_states, inputs["attention_mask"])
+
+    @staticmethod
+    def _mean_pool(hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Average token embeddings, ignoring padding positions."""
+        mask = attention_mask[..., None].astype(hidden_states.dtype)
+        summed = (hidden_states * mask).sum(axis=1)
+        counts = np.maximum(mask.sum(axis=1), 1)
+        return summed / counts
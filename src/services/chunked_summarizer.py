@@ -0,0 +1,138 @@
+"""Map-reduce summarization for content that is too long for a single call."""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from src.config import CHUNKING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedSummarizer:
+    """Summarize long content by summarizing overlapping chunks and merging them.
+
+    Args:
+        generate: Coroutine function that sends a prompt to the model and
+            returns the generated text
+        config: Chunking settings, see CHUNKING_CONFIG
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Awaitable[str]],
+        config: Dict = CHUNKING_CONFIG,
+    ):
+        self.generate = generate
+        self.chars_per_token = config["chars_per_token"]
+        self.max_single_call_tokens = config["max_single_call_tokens"]
+        self.chunk_tokens = config["chunk_tokens"]
+        self.overlap_tokens = config["overlap_tokens"]
+        self.max_concurrency = config["max_concurrency"]
+
+    def estimate_tokens(self, text: str) -> int:
+        """Approximate the number of model tokens in text."""
+        return len(text) // self.chars_per_token
+
+    def needs_chunking(self, text: str) -> bool:
+        """Whether text is too long to summarize in a single call."""
+        return self.estimate_tokens(text) > self.max_single_call_tokens
+
+    def split(self, text: str) -> List[str]:
+        """Split text on word boundaries into overlapping chunks.
+
+        Each chunk holds at most chunk_tokens (estimated) and repeats the
+        last overlap_tokens of the previous chunk so that sentences cut at a
+        boundary keep their context.
+        """
+        chunk_chars = self.chunk_tokens * self.chars_per_token
+        overlap_chars = self.overlap_tokens * self.chars_per_token
+
+        chunks = []
+        current: List[str] = []
+        current_chars = 0
+        for word in text.split():
+            if current and current_chars + len(word) + 1 > chunk_chars:
+                chunks.append(" ".join(current))
+
+                # Carry the tail of the finished chunk into the next one
+                overlap: List[str] = []
+                overlap_size = 0
+                for prev in reversed(current):
+                    if overlap_size + len(prev) + 1 > overlap_chars:
+                        break
+                    overlap.insert(0, prev)
+                    overlap_size += len(prev) + 1
+                current, current_chars = overlap, overlap_size
+
+            current.append(word)
+            current_chars += len(word) + 1
+
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    async def summarize(
+        self, content: str, language: str, detail_level: str
+    ) -> Tuple[str, Dict[str, float]]:
+        """Summarize content with a map step over chunks and a reduce step.
+
+        Returns:
+            Tuple of (summary, stage_timings) where stage_timings maps each
+            stage (split, map, reduce) to its duration in seconds
+        """
+        timings: Dict[str, float] = {}
+
+        stage_start = time.time()
+        chunks = self.split(content)
+        timings["split"] = time.time() - stage_start
+
+        stage_start = time.time()
+        partials = await self._map(chunks, language)
+        timings["map"] = time.time() - stage_start
+
+        # Partial summaries of very long content may still be too long to merge
+        # in one call, so condense them level by level until they fit or stop
+        # shrinking
+        stage_start = time.time()
+        combined = "\n\n".join(partials)
+        while self.needs_chunking(combined) and len(partials) > 1:
+            condensed = await self._map(self.split(combined), language)
+            if len(condensed) >= len(partials):
+                break
+            partials = condensed
+            combined = "\n\n".join(partials)
+
+        prompt = (
+            "The following are summaries of consecutive parts of one piece of "
+            f"content. Generate a summary of the whole content in {language}. "
+            f"{detail_level}:\n\n{combined}"
+        )
+        summary = await self.generate(prompt)
+        timings["reduce"] = time.time() - stage_start
+
+        logger.info(
+            f"Chunked summary of {len(chunks)} chunks finished in "
+            f"{sum(timings.values()):.2f}s"
+        )
+        return summary, timings
+
+    async def _map(self, chunks: List[str], language: str) -> List[str]:
+        """Summarize every chunk concurrently, bounded by max_concurrency."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def summarize_chunk(index: int, chunk: str) -> str:
+            prompt = (
+                f"This is part {index + 1} of {len(chunks)} of a longer text. "
+                f"Summarize it in {language}, keeping all key points, facts and "
+                f"names:\n\n{chunk}"
+            )
+            async with semaphore:
+                return await self.generate(prompt)
+
+        return list(
+            await asyncio.gather(
+                *(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks))
+            )
+        )
@@ -0,0 +1,207 @@
+"""Persistent sentence-embedding cache shared across restarts and processes.
+
+Vectors are stored as float16 rows of a fixed-size memory-mapped file, and
+a SQLite index maps each sentence key to its row. When the file is full, new
+vectors overwrite the oldest rows, ring-buffer style. Every process opening
+the same path sees the same vectors through the OS page cache, and SQLite's
+file locking serializes row allocation (and file creation) between writers.
+
+Readers don't lock anything, so a row can be overwritten between a reader's
+index lookup and its copy of the row. Each row's key is therefore kept in a
+second memory-mapped file: writers clear it before overwriting the row and
+set it after, and readers check it once they have copied the row, treating
+a mismatch as a miss.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# SQLite limits the number of bound parameters per statement
+_MAX_QUERY_PARAMS = 500
+
+# Length of a sentence_key (SHA-1 digest)
+KEY_SIZE = 20
+
+
+def sentence_key(sentence: str, model_version: str) -> bytes:
+    """Hash a whitespace-normalized sentence together with the model version."""
+    normalized = " ".join(sentence.split())
+    return hashlib.sha1(f"{model_version}\x00{normalized}".encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """Fixed-capacity float16 embedding store backed by a memory-mapped file.
+
+    Args:
+        path: Base path; the store uses ``<path>.f16``, ``<path>.keys`` and
+            ``<path>.idx``
+        capacity: Maximum number of vectors kept
+    """
+
+    def __init__(self, path: str, capacity: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.capacity = capacity
+        self._data_path = f"{path}.f16"
+        self._keys_path = f"{path}.keys"
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+
+        self._conn = sqlite3.connect(
+            f"{path}.idx", timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, slot INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_slot ON embeddings (slot)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def _read_layout(self) -> Optional[dict]:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'layout'").fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _open_vectors(self, dim: Optional[int] = None) -> bool:
+        """Map the vector and key files, creating them with dim columns if needed."""
+        if self._vectors is not None:
+            return True
+
+        layout = self._read_layout()
+        files_exist = os.path.exists(self._data_path) and os.path.exists(
+            self._keys_path
+        )
+        if layout is None and dim is None:
+            return False
+        if layout is None or not files_exist:
+            # Create the layout and the files under SQLite's write lock, so
+            # processes starting together never truncate each other's files
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                layout = self._read_layout()
+                if layout is None:
+                    layout = {"capacity": self.capacity, "dim": dim}
+                    self._conn.execute(
+                        "INSERT INTO meta (name, value) VALUES ('layout', ?)",
+                        (json.dumps(layout),),
+                    )
+                files = [
+                    (self._data_path, np.float16, layout["dim"]),
+                    (self._keys_path, np.uint8, KEY_SIZE),
+                ]
+                for file_path, dtype, width in files:
+                    if not os.path.exists(file_path):
+                        np.memmap(
+                            file_path,
+                            dtype=dtype,
+                            mode="w+",
+                            shape=(layout["capacity"], width),
+                        ).flush()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        self.capacity, self._dim = layout["capacity"], layout["dim"]
+        self._keys = np.memmap(
+            self._keys_path, dtype=np.uint8, mode="r+", shape=(self.capacity, KEY_SIZE)
+        )
+        self._vectors = np.memmap(
+            self._data_path,
+            dtype=np.float16,
+            mode="r+",
+            shape=(self.capacity, self._dim),
+        )
+        return True
+
+    def get_many(self, keys: List[bytes]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Look up vectors for keys.
+
+        Returns:
+            Tuple of (found, vectors) where found is a boolean mask over keys
+            and vectors holds float32 rows for the found keys (in key order),
+            or None if the store is still empty
+        """
+        found = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            if not keys or not self._open_vectors():
+                return found, None
+
+            slots = {}
+            for start in range(0, len(keys), _MAX_QUERY_PARAMS):
+                batch = keys[start : start + _MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                slots.update(
+                    self._conn.execute(
+                        f"SELECT key, slot FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                )
+
+            found = np.array([key in slots for key in keys], dtype=bool)
+            found_keys = [key for key in keys if key in slots]
+            rows = [slots[key] for key in found_keys]
+            vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+
+            # Check the row keys after copying the rows: a row overwritten
+            # since the index lookup no longer carries the key we looked up
+            expected = np.frombuffer(b"".join(found_keys), dtype=np.uint8)
+            intact = np.all(
+                self._keys[rows] == expected.reshape(-1, KEY_SIZE), axis=1
+            )
+            found[found] = intact
+            return found, vectors[intact]
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Store vectors under keys, overwriting the oldest rows when full."""
+        if not keys:
+            return
+        if len(keys) > self.capacity:
+            keys, vectors = keys[-self.capacity :], vectors[-self.capacity :]
+
+        with self._lock:
+            self._open_vectors(vectors.shape[1])
+            # BEGIN IMMEDIATE takes the write lock so concurrent processes
+            # never allocate the same rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE name = 'next_slot'"
+                ).fetchone()
+                next_slot = int(row[0]) if row else 0
+
+                slots = [(next_slot + i) % self.capacity for i in range(len(keys))]
+                self._conn.executemany(
+                    "DELETE FROM embeddings WHERE slot = ?", [(slot,) for slot in slots]
+                )
+                # Clear the row keys first, so readers of the rows being
+                # overwritten see a miss rather than another sentence's vector
+                self._keys[slots] = 0
+                self._vectors[slots] = vectors.astype(np.float16)
+                self._keys[slots] = np.frombuffer(
+                    b"".join(keys), dtype=np.uint8
+                ).reshape(-1, KEY_SIZE)
+                self._vectors.flush()
+                self._keys.flush()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, slot) VALUES (?, ?)",
+                    list(zip(keys, slots)),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('next_slot', ?)",
+                    (str((next_slot + len(keys)) % self.capacity),),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
@@ -0,0 +1,187 @@
+"""Content-addressed cache for generated summaries."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from src.config import PROMPT_VERSION, SUMMARY_CACHE_CONFIG
+from src.core.utils.cache import TTLCache
+from src.core.utils.shared_state import SharedState, shared_state
+from src.database import db_manager
+from src.logging import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_blocking(func, *args):
+    """Run a blocking store call in the default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class SQLiteSummaryStore:
+    """Persistent summary store backed by a local SQLite file."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await _run_blocking(self._get, key)
+
+    async def set(self, key: str, value: Dict, ttl_seconds: float) -> None:
+        await _run_blocking(self._set, key, value, ttl_seconds)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM summary_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Dict, ttl_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl_seconds),
+            )
+            self._conn.commit()
+
+
+class FirestoreSummaryStore:
+    """Persistent summary store backed by a Firestore collection."""
+
+    def __init__(self, collection: str):
+        self._collection = db_manager.db.collection(collection)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await _run_blocking(self._get, key)
+
+    async def set(self, key: str, value: Dict, ttl_seconds: float) -> None:
+        await _run_blocking(self._set, key, value, ttl_seconds)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        doc = self._collection.document(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if data.get("expires_at", 0) < time.time():
+            return None
+        return data.get("value")
+
+    def _set(self, key: str, value: Dict, ttl_seconds: float) -> None:
+        self._collection.document(key).set(
+            {"value": value, "expires_at": time.time() + ttl_seconds}
+        )
+
+
+class SharedStateSummaryStore:
+    """Summary store in the shared state, so every worker sees each summary."""
+
+    def __init__(self, state: SharedState):
+        self._state = state
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await self._state.get(f"summary:{key}")
+
+    async def set(self, key: str, value: Dict, ttl_seconds: float) -> None:
+        await self._state.set(f"summary:{key}", value, ttl_seconds)
+
+
+class SummaryCache:
+    """Two-level summary cache: in-process LRU with an optional persistent store.
+
+    Entries are keyed on the content source (YouTube video ID or URL), the
+    output language, summary length, summary type and prompt version, so any
+    change to one of them yields a fresh summary. Lookups and writes are
+    coroutines; the persistent stores do their blocking I/O off the loop.
+    """
+
+    def __init__(self, config: Dict = SUMMARY_CACHE_CONFIG):
+        self.enabled = config["enabled"]
+        self.ttl_seconds = config["ttl_seconds"]
+        self.memory = TTLCache(
+            max_entries=config["max_entries"], ttl_seconds=self.ttl_seconds
+        )
+        self.metrics = metrics_collector
+        self.store = None
+
+        backend = config.get("backend", "none")
+        try:
+            if backend == "sqlite":
+                self.store = SQLiteSummaryStore(config["sqlite_path"])
+            elif backend == "firestore":
+                self.store = FirestoreSummaryStore(config["firestore_collection"])
+            elif backend == "shared":
+                self.store = SharedStateSummaryStore(shared_state)
+        except Exception as e:
+            logger.error(f"Error initializing {backend} summary cache backend: {e}")
+
+    @staticmethod
+    def make_key(
+        source_id: str,
+        language: str,
+        summary_length: str,
+        summary_type: str,
+        prompt_version: str = PROMPT_VERSION,
+    ) -> str:
+        """Build a stable cache key from the summary inputs."""
+        raw = "|".join(
+            [source_id, language, summary_length, summary_type, prompt_version]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Return the cached summary for key, recording a hit or miss."""
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is None and self.store is not None:
+            try:
+                value = await self.store.get(key)
+            except Exception as e:
+                logger.error(f"Error reading summary cache backend: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+
+        self.metrics.log_cache_access("summary", hit=value is not None)
+        return value
+
+    async def set(self, key: str, value: Dict) -> None:
+        """Store a summary under key in memory and the persistent backend."""
+        if not self.enabled:
+            return
+
+        self.memory.set(key, value)
+        if self.store is not None:
+            try:
+                await self.store.set(key, value, self.ttl_seconds)
+            except Exception as e:
+                logger.error(f"Error writing summary cache backend: {e}")
+
+
+# Create a singleton instance
+summary_cache = SummaryCache()
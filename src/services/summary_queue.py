@@ -0,0 +1,224 @@
+"""Bounded background queue for summarization jobs, scheduled by tier.
+
+Update handlers validate a request, enqueue the summarization as a job and
+return at once, so long videos no longer hold handler slots (or webhook
+deliveries) open. A fixed pool of worker tasks runs the jobs.
+
+Jobs wait in one queue per tier and are dispatched by weighted fair
+queuing: every job gets a virtual finish tag that advances by 1 / weight
+of its tier, and workers always take the job with the smallest tag. Under
+load each tier gets a share of the workers proportional to its
+queue_weight in TIER_LIMITS, so pro jobs jump ahead of a free-tier backlog
+while free jobs still make steady progress. Each tier may also use at most
+max_concurrent_jobs workers at once, which keeps workers free for the
+other tiers. Once max_depth jobs of a tier are waiting, submit() refuses
+new ones so the handler can tell the user to try again. Jobs still queued
+when stop() gives up are dropped, and their on_cancel hooks run instead so
+callers can clean up after them.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.config import SUMMARY_QUEUE_CONFIG, TIER_LIMITS
+from src.logging import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+# Tier used for users whose tier is missing or unknown
+DEFAULT_TIER = "free"
+
+
+class SummaryJobQueue:
+    """Run summarization jobs on a bounded pool of workers, fairly by tier.
+
+    Args:
+        config: Queue settings, see SUMMARY_QUEUE_CONFIG
+        tier_limits: queue_weight and max_concurrent_jobs per tier, see
+            TIER_LIMITS
+        name: Prefix the per-tier queue metrics are recorded under
+    """
+
+    def __init__(
+        self,
+        config: Dict = SUMMARY_QUEUE_CONFIG,
+        tier_limits: Dict = TIER_LIMITS,
+        name: str = "summary",
+    ):
+        self.name = name
+        self.workers = config["workers"]
+        self.max_depth = config["max_depth"]
+        self.drain_timeout = config["drain_timeout_seconds"]
+        self.metrics = metrics_collector
+
+        self.weights = {
+            tier: limits.get("queue_weight", 1) for tier, limits in tier_limits.items()
+        }
+        self.concurrency_caps = {
+            tier: limits.get("max_concurrent_jobs", self.workers)
+            for tier, limits in tier_limits.items()
+        }
+
+        # (finish tag, enqueue time, job, on_cancel) per tier, in submission order
+        self._pending: Dict[str, Deque[Tuple[float, float, Job, Optional[Job]]]] = {
+            tier: deque() for tier in self.weights
+        }
+        self._running = {tier: 0 for tier in self.weights}
+        self._last_finish = {tier: 0.0 for tier in self.weights}
+        self._virtual_time = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker, across all tiers."""
+        return sum(len(pending) for pending in self._pending.values())
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        if not self.depth:
+            self._idle.set()
+        self._tasks = [
+            loop.create_task(self._worker(index)) for index in range(self.workers)
+        ]
+        logger.info(
+            f"Summary job queue started with {self.workers} workers "
+            f"(max depth {self.max_depth} per tier)"
+        )
+
+    def submit(
+        self, job: Job, tier: str = DEFAULT_TIER, on_cancel: Optional[Job] = None
+    ) -> bool:
+        """Enqueue a job for a user of the given tier.
+
+        Returns False if that tier's queue is full. The workers are started
+        on first use when start() was not called (e.g. when the bot runs
+        with run_polling).
+
+        Args:
+            job: Coroutine function to run on a worker
+            tier: User tier the job is scheduled under
+            on_cancel: Coroutine function run instead of job if stop() drops
+                the job before a worker takes it
+        """
+        if not self.running:
+            self.start()
+        tier = tier if tier in self.weights else DEFAULT_TIER
+        pending = self._pending[tier]
+        if len(pending) >= self.max_depth:
+            self.metrics.log_queue_rejected(f"{self.name}.{tier}")
+            return False
+
+        finish = (
+            max(self._virtual_time, self._last_finish[tier]) + 1 / self.weights[tier]
+        )
+        self._last_finish[tier] = finish
+        pending.append((finish, time.perf_counter(), job, on_cancel))
+        self.metrics.log_queue_depth(f"{self.name}.{tier}", len(pending))
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Let queued and running jobs finish, then stop the workers.
+
+        Jobs still queued after the timeout are dropped and their on_cancel
+        hooks run; running jobs are cancelled.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain before cancelling
+                whatever is left; defaults to drain_timeout_seconds
+        """
+        if not self._tasks:
+            return
+        timeout = self.drain_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Summary job queue not drained after {timeout}s, "
+                f"cancelling {self.depth} queued jobs"
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        dropped = []
+        for tier, pending in self._pending.items():
+            dropped.extend(on_cancel for _, _, _, on_cancel in pending if on_cancel)
+            pending.clear()
+            self.metrics.log_queue_depth(f"{self.name}.{tier}", 0)
+        results = await asyncio.gather(
+            *(on_cancel() for on_cancel in dropped), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error cancelling dropped summary job: {result}")
+        logger.info("Summary job queue stopped")
+
+    def _next_job(self) -> Optional[Tuple[str, float, Job]]:
+        """Take the job with the smallest finish tag among tiers under their cap."""
+        best = None
+        for tier, pending in self._pending.items():
+            if not pending or self._running[tier] >= self.concurrency_caps[tier]:
+                continue
+            if best is None or pending[0][0] < self._pending[best][0][0]:
+                best = tier
+        if best is None:
+            return None
+
+        finish, enqueued_at, job, _ = self._pending[best].popleft()
+        self._virtual_time = finish
+        self._running[best] += 1
+        self.metrics.log_queue_depth(f"{self.name}.{best}", len(self._pending[best]))
+        return best, enqueued_at, job
+
+    async def _worker(self, index: int) -> None:
+        """Run jobs one at a time, in weighted fair order."""
+        while True:
+            next_job = self._next_job()
+            if next_job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            tier, enqueued_at, job = next_job
+            started_at = time.perf_counter()
+            success = False
+            try:
+                await job()
+                success = True
+            except Exception as e:
+                logger.error(f"Summary job failed in worker {index}: {e}", exc_info=True)
+            finally:
+                self.metrics.log_queue_job(
+                    f"{self.name}.{tier}",
+                    wait_time=started_at - enqueued_at,
+                    service_time=time.perf_counter() - started_at,
+                    success=success,
+                )
+                self._running[tier] -= 1
+                if not self.depth and not any(self._running.values()):
+                    self._idle.set()
+                # A tier dropped below its cap, so a waiting job may now run
+                self._wakeup.set()
+
+
+# Create a singleton instance
+summary_queue = SummaryJobQueue()
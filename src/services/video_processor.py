@@ -1,26 +1,41 @@
 """Video and text processing service for generating summaries."""
 
+import asyncio
 import logging
-from typing import Dict, Optional, Tuple
-import torch
-from transformers import DistilBertTokenizer, DistilBertModel
-import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import aiohttp
+import psutil
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
-from src.core.utils.rate_limit import check_rate_limit, check_monthly_limit
-from src.database import db_manager
+from src.database import async_db_manager, db_manager, stats_buffer
+from src.database.db_manager import LIMIT_COUNTERS
 from src.services import monitoring_service
 from src.logging import metrics_collector
 import google.generativeai as genai
 from src.core.utils import escape_md
+from src.core.utils.cache import TTLCache
+from src.core.utils.shared_state import shared_state
+from src.core.utils.video import content_source_id
+from src.services.chunked_summarizer import ChunkedSummarizer
+from src.services.summary_cache import summary_cache
 from src.config import MAX_SUMMARY_LENGTH
 from youtube_transcript_api import YouTubeTranscriptApi
 from bs4 import BeautifulSoup
-import requests
-from src.config import GEMINI_API_KEY
+from src.config import (
+    BERT_CONFIG,
+    GEMINI_API_KEY,
+    PROCESSING_CONFIG,
+    TRANSCRIPT_CACHE_CONFIG,
+)
 import time
 
+# Summary types process_link can generate
+SUMMARY_TYPES = ("gemini", "bert", "both")
+
 
 class VideoProcessor:
     _instance = None
@@ -36,26 +51,82 @@ class VideoProcessor:
         """Initialize video processor with required dependencies."""
         if not hasattr(self, "initialized"):
             self.db = db_manager
+            self.async_db = async_db_manager
+            self.stats_buffer = stats_buffer
             self.monitoring = monitoring_service
             self.logger = logging.getLogger("video_processor")
             self.metrics = metrics_collector
+            self.summary_cache = summary_cache
+            self.shared_state = shared_state
+
+            # Transcript cache plus in-flight fetches shared between callers
+            self.transcript_cache = TTLCache(
+                max_entries=TRANSCRIPT_CACHE_CONFIG["max_entries"],
+                ttl_seconds=TRANSCRIPT_CACHE_CONFIG["ttl_seconds"],
+            )
+            self._in_flight: Dict[str, asyncio.Future] = {}
+
+            # Bounded execution resources so blocking work stays off the event loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=PROCESSING_CONFIG["worker_threads"],
+                thread_name_prefix="video_processor",
+            )
+            self._gemini_semaphore = asyncio.Semaphore(
+                PROCESSING_CONFIG["gemini_max_concurrency"]
+            )
+            self._http_semaphore = asyncio.Semaphore(
+                PROCESSING_CONFIG["http_max_concurrency"]
+            )
+            self.chunked_summarizer = ChunkedSummarizer(self._generate_text)
 
             # Initialize Gemini
             genai.configure(api_key=GEMINI_API_KEY)
             self.model = genai.GenerativeModel("models/gemini-1.5-flash")
 
-            # Initialize DistilBERT
-            self.tokenizer = DistilBertTokenizer.from_pretrained(
-                "distilbert-base-multilingual-cased"
-            )
-            self.bert_model = DistilBertModel.from_pretrained(
-                "distilbert-base-multilingual-cased"
-            )
-            self.bert_model.eval()  # Set to evaluation mode
+            # DistilBERT is loaded on the first BERT summary (or by warm_up)
+            self._bert_ranker = None
+            self._bert_lock = threading.Lock()
             self.initialized = True
 
+    async def warm_up(self) -> None:
+        """Load the DistilBERT ranker ahead of the first BERT summary."""
+        await self._run_blocking(self._get_bert_ranker)
+
+    def _get_bert_ranker(self):
+        """Return the DistilBERT ranker, loading it on first use.
+
+        Loading imports torch and transformers, so it runs at most once and
+        reports its load time and memory footprint to the metrics collector.
+        """
+        if self._bert_ranker is None:
+            with self._bert_lock:
+                if self._bert_ranker is None:
+                    process = psutil.Process()
+                    rss_before = process.memory_info().rss
+                    start_time = time.time()
+
+                    from src.services.bert_ranker import BertRanker
+
+                    ranker = BertRanker()
+                    self.metrics.log_model_load(
+                        model_name=f"{BERT_CONFIG['model_name']} ({BERT_CONFIG['backend']})",
+                        load_time=time.time() - start_time,
+                        memory_mb=(process.memory_info().rss - rss_before)
+                        / 1024
+                        / 1024,
+                    )
+                    self._bert_ranker = ranker
+        return self._bert_ranker
+
     async def process_link(
-        self, link: str, user_id: int, language: str = "en", summary_type: str = "both"
+        self,
+        link: str,
+        user_id: int,
+        language: str = "en",
+        summary_type: str = "both",
+        content: Optional[str] = None,
+        snapshot=None,
+        on_content: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Tuple[bool, Dict]:
         """Process a link and generate summary.
 
@@ -67,51 +138,80 @@ class VideoProcessor:
                 - "gemini": Use only Gemini
                 - "bert": Use DistilBERT + Gemini
                 - "both": Generate both summaries (default)
+            content: Already extracted content for the link, if the caller
+                fetched it (e.g. to compute an ETA)
+            snapshot: Optional UserSnapshot already loaded for this update,
+                used instead of reading the user's preferences again
+            on_content: Awaited with the extracted content once the summary
+                cache missed, before summarizing (e.g. to show an ETA)
+
+        Rate and monthly limits are the caller's job: handle_text checks the
+        rate limit and reserves the summary with reserve_summary before it
+        queues the job.
         """
+        if summary_type not in SUMMARY_TYPES:
+            return False, {"error": f"Unknown summary type: {summary_type}"}
+
         start_time = time.time()
         try:
-            # Check rate limits
-            if summary_type != "test":
-                rate_limit_ok = await check_rate_limit(user_id)
-                if not rate_limit_ok:
-                    return False, {"error": "Rate limit exceeded"}
-
-                monthly_limit_ok, error_msg, summaries_used = await check_monthly_limit(
-                    user_id
-                )
-                if not monthly_limit_ok:
-                    return False, {"error": error_msg}
-
-            # Extract content from URL
-            content = await self._extract_content(link)
+            # Serve repeated requests for the same content from the summary cache
+            if snapshot is not None:
+                user_prefs = snapshot.preferences
+            else:
+                user_prefs = await self.async_db.get_user_preferences(user_id)
+            summary_length = user_prefs.get("summary_length", "medium")
+            cache_key = self.summary_cache.make_key(
+                source_id=content_source_id(link)[1],
+                language=language,
+                summary_length=summary_length,
+                summary_type=summary_type,
+            )
+            cached = await self.summary_cache.get(cache_key)
+            if cached is not None:
+                results = dict(cached)
+                results.update({"url": link, "language": language, "cached": True})
+                return True, results
+
+            # Extract content from URL unless the caller already did
+            if content is None:
+                content = await self._extract_content(link)
             if not content:
                 return False, {"error": "Could not extract content from URL"}
+            if on_content is not None:
+                await on_content(content)
 
-            results = {}
-
-            # Generate summaries based on requested type
+            # Generate the requested summaries concurrently from the same
+            # content and preferences
+            generators = {}
             if summary_type in ["gemini", "both"]:
-                success, gemini_result = await self._generate_gemini_summary(
-                    content, language, user_id
+                generators["gemini_summary"] = self._generate_gemini_summary(
+                    content, language, user_id, summary_length=summary_length
                 )
-                if success:
-                    results["gemini_summary"] = gemini_result["summary"]
-                else:
-                    return False, gemini_result
-
             if summary_type in ["bert", "both"]:
-                success, bert_result = await self._generate_bert_summary(
-                    content, language, user_id
+                generators["bert_summary"] = self._generate_bert_summary(
+                    content, language, user_id, summary_length=summary_length
                 )
+            outcomes = await asyncio.gather(*generators.values())
+
+            # Keep whichever summaries succeeded; fail only if all of them did
+            results = {}
+            errors = {}
+            for name, (success, result) in zip(generators, outcomes):
                 if success:
-                    results["bert_summary"] = bert_result["summary"]
+                    results[name] = result["summary"]
                 else:
-                    return False, bert_result
+                    errors[name] = result["error"]
+            if errors and not results:
+                return False, {"error": next(iter(errors.values()))}
+
+            results["content_length"] = len(content)
+            if not errors:
+                await self.summary_cache.set(cache_key, dict(results))
+            else:
+                results["errors"] = errors
 
             # Add metadata
-            results.update(
-                {"url": link, "content_length": len(content), "language": language}
-            )
+            results.update({"url": link, "language": language})
 
             # Calculate total processing time
             processing_time = time.time() - start_time
@@ -136,35 +236,141 @@ class VideoProcessor:
             return False, {"error": str(e)}
 
     async def _extract_content(self, url: str) -> Optional[str]:
-        """Extract content from URL."""
+        """Extract content from URL.
+
+        Transcripts are cached per video ID, and concurrent requests for the
+        same video share a single in-flight fetch (across workers too, when
+        the shared state is distributed).
+        """
+        video_id, cache_key = content_source_id(url)
+
+        content = self.transcript_cache.get(cache_key)
+        if content is not None:
+            self.metrics.log_cache_access("transcript", hit=True)
+            return content
+
+        fetch = self._in_flight.get(cache_key)
+        self.metrics.log_cache_access("transcript", hit=fetch is not None)
+        if fetch is None:
+            if self.shared_state.distributed:
+                fetch = asyncio.ensure_future(
+                    self._fetch_shared_content(url, video_id, cache_key)
+                )
+            else:
+                fetch = asyncio.ensure_future(self._fetch_content(url, video_id))
+            self._in_flight[cache_key] = fetch
+            fetch.add_done_callback(lambda _: self._in_flight.pop(cache_key, None))
+
+        # Shield the shared fetch so one cancelled caller doesn't cancel the rest
+        content = await asyncio.shield(fetch)
+        if content:
+            self.transcript_cache.set(cache_key, content)
+        return content
+
+    async def _fetch_shared_content(
+        self, url: str, video_id: Optional[str], cache_key: str
+    ) -> Optional[str]:
+        """Fetch content once across all workers, through the shared state.
+
+        The first worker to claim the key fetches and publishes the content;
+        the others wait for it, and fetch it themselves if the claim lapses
+        or ends without a result.
+        """
+        state_key = f"transcript:{cache_key}"
+        claim_key = f"inflight:{state_key}"
+        claim_ttl = TRANSCRIPT_CACHE_CONFIG["inflight_ttl_seconds"]
+
+        content = await self.shared_state.get(state_key)
+        self.metrics.log_cache_access("shared_transcript", hit=content is not None)
+        if content is not None:
+            return content
+
+        claimed = await self.shared_state.add(claim_key, time.time(), claim_ttl)
+        if not claimed:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + claim_ttl
+            while loop.time() < deadline:
+                await asyncio.sleep(TRANSCRIPT_CACHE_CONFIG["inflight_poll_seconds"])
+                content = await self.shared_state.get(state_key)
+                if content is not None:
+                    return content
+                if await self.shared_state.get(claim_key) is None:
+                    break
+
         try:
-            if "youtube.com" in url or "youtu.be" in url:
-                # Extract YouTube transcript
+            content = await self._fetch_content(url, video_id)
+            if content:
+                await self.shared_state.set(
+                    state_key, content, TRANSCRIPT_CACHE_CONFIG["ttl_seconds"]
+                )
+            return content
+        finally:
+            if claimed:
+                await self.shared_state.delete(claim_key)
 
-                video_id = url.split("v=")[-1].split("&")[0]
-                transcript = YouTubeTranscriptApi.get_transcript(
-                    video_id, languages=["en", "ru"]
+    async def _fetch_content(self, url: str, video_id: Optional[str]) -> Optional[str]:
+        """Fetch content from the source without consulting the cache."""
+        try:
+            if video_id:
+                # Extract YouTube transcript in the worker pool
+                transcript = await self._run_blocking(
+                    YouTubeTranscriptApi.get_transcript,
+                    video_id,
+                    languages=["en", "ru"],
                 )
                 return " ".join([t["text"] for t in transcript])
             else:
                 # Extract article content
-
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, "html.parser")
-                return soup.get_text()
+                timeout = aiohttp.ClientTimeout(
+                    total=PROCESSING_CONFIG["http_timeout_seconds"]
+                )
+                async with self._http_semaphore:
+                    async with aiohttp.ClientSession(timeout=timeout) as session:
+                        async with session.get(url) as response:
+                            html = await response.text()
+                return await self._run_blocking(self._parse_article, html)
         except Exception as e:
             self.logger.error(f"Error extracting content: {str(e)}")
             return None
 
+    @staticmethod
+    def _parse_article(html: str) -> str:
+        """Extract the visible text from an HTML page."""
+        return BeautifulSoup(html, "html.parser").get_text()
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking callable in the bounded worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def _generate_content(self, prompt: str):
+        """Call Gemini asynchronously, bounded by the configured concurrency."""
+        async with self._gemini_semaphore:
+            return await self.model.generate_content_async(prompt)
+
+    async def _generate_text(self, prompt: str) -> str:
+        """Call Gemini and return the response text, failing on empty output."""
+        response = await self._generate_content(prompt)
+        if response and response.text:
+            return response.text
+        raise ValueError("Empty response from Gemini model")
+
     async def _generate_gemini_summary(
-        self, content: str, language: str, user_id: int
+        self,
+        content: str,
+        language: str,
+        user_id: int,
+        summary_length: Optional[str] = None,
     ) -> Tuple[bool, Dict]:
         """Generate summary using only Gemini."""
         start_time = time.time()
         try:
             # Get user's summary length preference
-            user_prefs = self.db.get_user_preferences(user_id)
-            summary_length = user_prefs.get("summary_length", "medium")
+            if summary_length is None:
+                user_prefs = await self.async_db.get_user_preferences(user_id)
+                summary_length = user_prefs.get("summary_length", "medium")
 
             # Adjust prompt based on summary length
             detail_level = {
@@ -176,15 +382,19 @@ class VideoProcessor:
                 "Create a balanced summary covering main points and key details",
             )
 
-            # Prepare prompt
-            prompt = f"Generate a summary of this content in {language}. {detail_level}:\n\n{content}"
-
-            # Generate summary
-            response = self.model.generate_content(prompt)
-            if response and response.text:
-                summary = response.text
+            if self.chunked_summarizer.needs_chunking(content):
+                # Long content: summarize chunks concurrently, then merge them
+                summary, stage_timings = await self.chunked_summarizer.summarize(
+                    content, language, detail_level
+                )
             else:
-                raise ValueError("Empty response from Gemini model")
+                # Prepare prompt
+                prompt = f"Generate a summary of this content in {language}. {detail_level}:\n\n{content}"
+
+                # Generate summary
+                generate_start = time.time()
+                summary = await self._generate_text(prompt)
+                stage_timings = {"generate": time.time() - generate_start}
 
             # Track metrics
             processing_time = time.time() - start_time
@@ -194,6 +404,7 @@ class VideoProcessor:
                 success=True,
                 summary_type="gemini",
                 processing_time=processing_time,
+                stage_timings=stage_timings,
             )
 
             return True, {"summary": summary}
@@ -215,55 +426,31 @@ class VideoProcessor:
             return False, {"error": str(e)}
 
     async def _generate_bert_summary(
-        self, content: str, language: str, user_id: int
+        self,
+        content: str,
+        language: str,
+        user_id: int,
+        summary_length: Optional[str] = None,
     ) -> Tuple[bool, Dict]:
         """Generate summary using DistilBERT preprocessing + Gemini."""
         start_time = time.time()
         try:
             # Get user's summary length preference
-            user_prefs = self.db.get_user_preferences(user_id)
-            summary_length = user_prefs.get("summary_length", "medium")
+            if summary_length is None:
+                user_prefs = await self.async_db.get_user_preferences(user_id)
+                summary_length = user_prefs.get("summary_length", "medium")
 
             # Adjust number of sentences based on summary length
             max_sentences = {"short": 3, "medium": 5, "detailed": 8}.get(
                 summary_length, 5
             )
 
-            # Preprocess with DistilBERT
-            inputs = self.tokenizer(
-                content, return_tensors="pt", truncation=True, max_length=512
-            )
-            with torch.no_grad():
-                outputs = self.bert_model(**inputs)
-
-            # Get embeddings and find key sentences
-            embeddings = outputs.last_hidden_state.mean(dim=1).numpy()
-            sentences = content.split(". ")
-            sentence_embeddings = []
-
-            # Generate embeddings for each sentence
-            for sentence in sentences:
-                if sentence:
-                    inputs = self.tokenizer(
-                        sentence, return_tensors="pt", truncation=True
-                    )
-                    with torch.no_grad():
-                        outputs = self.bert_model(**inputs)
-                    sentence_embeddings.append(
-                        outputs.last_hidden_state.mean(dim=1).numpy()
-                    )
-
-            # Find most relevant sentences using cosine similarity
-            similarities = []
-            for sent_emb in sentence_embeddings:
-                similarity = np.dot(embeddings, sent_emb.T) / (
-                    np.linalg.norm(embeddings) * np.linalg.norm(sent_emb)
+            # Rank sentences with DistilBERT in the worker pool
+            top_sentences = await self._run_blocking(
+                lambda: self._get_bert_ranker().select_key_sentences(
+                    content, max_sentences
                 )
-                similarities.append(float(similarity))
-
-            # Get top sentences based on user's preference
-            top_indices = np.argsort(similarities)[-max_sentences:]
-            top_sentences = [sentences[i] for i in sorted(top_indices)]
+            )
 
             # Use Gemini to polish the summary
             key_points = ". ".join(top_sentences)
@@ -280,7 +467,7 @@ class VideoProcessor:
 
             prompt = f"Based on these key points, {detail_level} in {language}:\n\n{key_points}"
 
-            response = self.model.generate_content(prompt)
+            response = await self._generate_content(prompt)
             summary = response.text
 
             # Track metrics
@@ -323,6 +510,8 @@ class VideoProcessor:
 
             if "gemini_summary" in summary_data:
                 message += escape_md(summary_data["gemini_summary"]) + "\n\n"
+            elif "bert_summary" in summary_data:
+                message += escape_md(summary_data["bert_summary"]) + "\n\n"
 
             # Send message with menu button
             from src.core.keyboards.menu import create_main_menu_keyboard
@@ -337,19 +526,16 @@ class VideoProcessor:
             
             # Only increment stats after successful send and if this is not a test
             if user_id and summary_type != "test":
-                # Increment monthly summaries used
-                self.db.increment_summaries_used(user_id)
-
-                # Log successful summary generation with all stats
-                self.db.increment_user_stats(
-                    user_id=user_id,
-                    summary_type="text",
-                    processing_time=processing_time,
-                )
+                # The limit counters were incremented when the summary was
+                # reserved; only the stats are buffered, written in batches
+                increments = self.db.summary_stats_increments("text", processing_time)
+                for field in LIMIT_COUNTERS:
+                    increments.pop(field, None)
+                self.stats_buffer.increment(user_id, increments)
 
                 # Add to user's history
                 if url:
-                    self.db.add_to_history(
+                    await self.async_db.add_to_history(
                         user_id,
                         {
                             "url": url,
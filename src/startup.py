@@ -1,18 +1,25 @@
-"""Optimized startup process for the application."""
+"""Optimized startup process for the application.
+
+The FastAPI server and the Telegram Application share one asyncio event
+loop: uvicorn's Server.serve() runs on it, and the server's lifespan
+starts the bot (polling, or the webhook when WEBHOOK_URL is set) and the
+background services, and drains them again on shutdown.
+"""
 
 import asyncio
-import threading
 from functools import lru_cache
 import uvicorn
 from contextlib import asynccontextmanager
-from telegram import Bot
+from fastapi import FastAPI
 import firebase_admin
 from firebase_admin import credentials
 import logging
 
-from src.config import TOKEN, logger
+from src.config import BERT_CONFIG, DATABASE_CONFIG, TOKEN, WEBHOOK_CONFIG
 from src.bot.bot import application, payment_processor
+from src.database import stats_buffer
 from src.routes import webhook_app
+from src.services import VideoProcessor, summary_queue
 
 # Configure startup logger
 startup_logger = logging.getLogger("startup")
@@ -22,10 +29,10 @@ startup_logger = logging.getLogger("startup")
 def initialize_firebase():
     """Lazy initialization of Firebase Admin SDK."""
     try:
+        if DATABASE_CONFIG["backend"] != "firestore":
+            return
         if not firebase_admin._apps:
-            cred = credentials.Certificate(
-                "sumari-e218a-firebase-adminsdk-fbsvc-4237ee8346.json"
-            )
+            cred = credentials.Certificate(DATABASE_CONFIG["credentials_path"])
             firebase_admin.initialize_app(cred)
             startup_logger.info("Firebase initialized successfully")
     except Exception as e:
@@ -36,63 +43,55 @@ def initialize_firebase():
 async def setup_webhook(url: str):
     """Set up webhook for the bot with error handling."""
     try:
-        bot = Bot(TOKEN)
-        await bot.delete_webhook()
         webhook_url = f"{url}/telegram-webhook/{TOKEN}"
-        await bot.set_webhook(webhook_url)
-        startup_logger.info(f"Webhook set up at {webhook_url}")
+        await application.bot.set_webhook(
+            webhook_url,
+            secret_token=WEBHOOK_CONFIG["secret_token"],
+            allowed_updates=["message", "callback_query"],
+        )
+        startup_logger.info(f"Webhook set up at {url}/telegram-webhook/...")
     except Exception as e:
         startup_logger.error(f"Webhook setup error: {e}")
         raise
 
 
-def run_fastapi():
-    """Run the FastAPI server in a separate thread with optimized settings."""
-    try:
-        uvicorn.run(
-            webhook_app,
-            host="0.0.0.0",
-            port=8000,
-            log_level="warning",  # Reduce logging
-            reload=False,
-            access_log=False,  # Disable access logs
-            limit_concurrency=100,  # Limit concurrent connections
-            timeout_keep_alive=30,  # Reduce keep-alive timeout
-        )
-    except Exception as e:
-        startup_logger.error(f"FastAPI startup error: {e}")
-        raise
+def fastapi_config() -> uvicorn.Config:
+    """uvicorn settings for the FastAPI server."""
+    return uvicorn.Config(
+        webhook_app,
+        host="0.0.0.0",
+        port=WEBHOOK_CONFIG["port"],
+        log_level="warning",  # Reduce logging
+        reload=False,
+        access_log=False,  # Disable access logs
+        limit_concurrency=100,  # Limit concurrent connections
+        timeout_keep_alive=30,  # Reduce keep-alive timeout
+        lifespan="on",  # Fail startup if the bot cannot start
+    )
 
 
 @asynccontextmanager
 async def bot_runtime():
-    """Managed bot lifecycle."""
+    """Managed bot lifecycle.
+
+    On exit, stops taking updates, lets accepted summaries finish and
+    writes their buffered usage counters before closing the bot, whose
+    HTTP client the summaries still use to reply.
+    """
     try:
         await application.initialize()
         await application.start()
         startup_logger.info("Bot runtime initialized")
         yield
     finally:
-        await application.stop()
-
-
-async def run_bot():
-    """Run the bot with optimized settings."""
-    try:
-        startup_logger.info("Starting bot application...")
-        await application.run_polling(
-            drop_pending_updates=True,
-            close_loop=False,
-            allowed_updates=[
-                "message",
-                "callback_query",
-            ],  # Only listen for needed updates
-            read_timeout=30,
-            write_timeout=30,
-        )
-    except Exception as e:
-        startup_logger.error(f"Bot runtime error: {e}")
-        raise
+        if application.updater and application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+        await summary_queue.stop()
+        await stats_buffer.stop()
+        await application.shutdown()
+        startup_logger.info("Bot runtime stopped")
 
 
 async def initialize_services():
@@ -105,28 +104,52 @@ async def initialize_services():
         # Add payment processor to FastAPI state
         webhook_app.state.payment_processor = payment_processor
 
+        # Start batching usage counter writes
+        stats_buffer.start()
+
+        # Start the summarization workers
+        summary_queue.start()
+
+        # Optionally load DistilBERT now rather than on the first BERT summary
+        if BERT_CONFIG["warm_up"]:
+            await VideoProcessor().warm_up()
+
         startup_logger.info("All services initialized")
     except Exception as e:
         startup_logger.error(f"Service initialization error: {e}")
         raise
 
 
-async def main():
-    """Optimized main startup sequence."""
-    try:
-        startup_logger.info("Starting application...")
-
-        # Initialize services first
-        await initialize_services()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the bot and background services for as long as the server runs."""
+    await initialize_services()
+    async with bot_runtime():
+        if WEBHOOK_CONFIG["url"]:
+            await setup_webhook(WEBHOOK_CONFIG["url"])
+            startup_logger.info("Serving Telegram updates through the webhook")
+        else:
+            await application.updater.start_polling(
+                drop_pending_updates=True,
+                allowed_updates=[
+                    "message",
+                    "callback_query",
+                ],  # Only listen for needed updates
+            )
+            startup_logger.info("Polling Telegram for updates")
+        yield
 
-        # Start FastAPI in background
-        fastapi_thread = threading.Thread(target=run_fastapi)
-        fastapi_thread.daemon = True
-        fastapi_thread.start()
 
-        # Start the bot
-        await run_bot()
+async def main():
+    """Serve FastAPI and the bot on the current event loop until stopped.
 
+    uvicorn handles SIGINT/SIGTERM: it stops accepting requests, finishes
+    open ones and then runs the lifespan shutdown.
+    """
+    startup_logger.info("Starting application...")
+    webhook_app.router.lifespan_context = lifespan
+    try:
+        await uvicorn.Server(fastapi_config()).serve()
     except Exception as e:
         startup_logger.error(f"Startup error: {e}")
         raise